@@ -1,12 +1,43 @@
 # auth.py - FIXED VERSION
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timezone
+from cachetools import TTLCache
+import hashlib
+from typing import Optional
+import os
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from JWT token"""
+# sha256(token) -> verified JWT payload, so repeat requests skip signature checks.
+# Only successful verifications are stored. Verification is synchronous, so
+# concurrent requests can't race on a cold entry and no lock is needed.
+VERIFIED_TOKEN_CACHE_TTL_SECONDS = int(os.getenv('JWT_CACHE_TTL', '300'))
+VERIFIED_TOKEN_CACHE_MAX = int(os.getenv('JWT_CACHE_MAX', '4096'))
+_verified_tokens = TTLCache(maxsize=VERIFIED_TOKEN_CACHE_MAX, ttl=VERIFIED_TOKEN_CACHE_TTL_SECONDS)
+
+def verify_token_cached(auth_service, token: str) -> dict:
+    """Verify a JWT once and reuse the payload until the cache entry or the token expires"""
+    token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _verified_tokens.get(token_key)
+    
+    if payload is not None:
+        if 'exp' not in payload or datetime.now(timezone.utc).timestamp() <= payload['exp']:
+            return payload
+        _verified_tokens.pop(token_key, None)
+    
+    payload = auth_service.verify_jwt_token(token)
+    _verified_tokens[token_key] = payload
+    return payload
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Get current user from JWT token
+    
+    The user, and the stored profile it came from (None when only the JWT
+    payload is available), are kept on request.state for the rest of the
+    request so handlers and services don't fetch them again.
+    """
+    request.state.user_profile = None
     try:
         # Import here to avoid circular imports and use initialized services
         from main import auth_service
@@ -14,8 +45,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         token = credentials.credentials
         print(f"🔍 Validating JWT token for protected endpoint...")
         
-        # Verify JWT token using auth_service
-        payload = auth_service.verify_jwt_token(token)
+        # Verify JWT token using auth_service (cached per token)
+        payload = verify_token_cached(auth_service, token)
         uid = payload['uid']
         email = payload['email']
         
@@ -25,9 +56,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         user_profile = None
         try:
             if hasattr(auth_service.firebase_service, 'get_user_profile'):
-                user_profile = await auth_service.firebase_service.get_user_profile(uid)
+                user_profile = await auth_service.firebase_service.get_user_profile(uid, use_cache=True)
                 if user_profile:
                     print(f"✅ User profile found and loaded")
+                    request.state.user_profile = user_profile
+                    request.state.user = user_profile
                     return user_profile
             else:
                 print(f"⚠️ get_user_profile method not available in FirebaseService")
@@ -56,6 +89,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         }
         
         print(f"✅ Returning minimal user data for authenticated request")
+        request.state.user = minimal_user
         return minimal_user
         
     except Exception as e:
@@ -79,4 +113,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=detail,
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+async def get_current_uid(user=Depends(get_current_user)) -> str:
+    """Just the authenticated user's uid, for endpoints that need nothing else"""
+    return user["uid"]
+
+async def get_current_user_profile(request: Request, user=Depends(get_current_user)) -> Optional[dict]:
+    """The stored profile loaded during authentication, or None if the user has none yet"""
+    return request.state.user_profile
@@ -0,0 +1,54 @@
+# conditional_get.py - ETag / If-None-Match support for JSON GET endpoints
+from typing import Any, Dict, Optional
+from datetime import datetime
+from fastapi import Request, Response, status
+from pydantic import BaseModel, TypeAdapter
+import hashlib
+import orjson
+
+# Clients that send back the ETag they have get an empty 304. no-cache (rather
+# than max-age) so a client always revalidates and sees its own writes.
+CONDITIONAL_GET_CACHE_CONTROL = "private, no-cache"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when If-None-Match names this ETag (weak comparison, as for any GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def _json_default(value: Any) -> Any:
+    """orjson fallback for pydantic models and datetime subclasses
+    
+    orjson encodes plain datetimes itself but refuses subclasses such as the
+    DatetimeWithNanoseconds values Firestore returns.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    adapter: Optional[TypeAdapter] = None
+) -> Response:
+    """JSON response with a weak ETag of its body, or a 304 when the client's copy matches
+    
+    Pass a module-level TypeAdapter for lists of models so the whole list is
+    dumped in one pydantic-core pass instead of once per element.
+    """
+    if adapter is not None:
+        content = adapter.dump_python(content, mode="json")
+    body = orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+    response_headers = {"ETag": etag, "Cache-Control": CONDITIONAL_GET_CACHE_CONTROL, **(headers or {})}
+    
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
@@ -0,0 +1,7 @@
+# errors.py - errors services raise for main.py's exception handlers to answer
+
+class NotFoundError(ValueError):
+    """The item doesn't exist or isn't the caller's; answered with a 404
+
+    A ValueError so callers that already catch ValueError keep working.
+    """
@@ -1,39 +1,60 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
 from typing import Optional
 import os
+import asyncio
+import uuid
+import httpx
 import jwt
-from datetime import datetime
 from fastapi import Query
 from dotenv import load_dotenv
 import json
-from fastapi.responses import HTMLResponse
+import re
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, ORJSONResponse
+from urllib.parse import urlencode
+from html import escape, unescape
 from datetime import datetime, timezone
 from typing import List, Dict, Any
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 from pydantic import BaseModel, field_validator
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
 from firebase_admin import firestore
+from google.api_core import exceptions as gexc
 import requests
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging for debug router
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("betty_debug")
+# Configure logging. Records are formatted where they're logged, then written by
+# listener threads fed by queues, so a log call on the request path is a queue
+# put and never blocks the event loop on I/O.
+log_queue = queue.SimpleQueue()
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s %(levelname)s %(name)s %(message)s',
+    handlers=[QueueHandler(log_queue)]
+)
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+
+logger = logging.getLogger("betty")
 
-# Create a file handler for debug logs
-debug_handler = logging.FileHandler('debug_logs.txt')
-debug_handler.setLevel(logging.DEBUG)
-debug_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-debug_handler.setFormatter(debug_formatter)
-logger.addHandler(debug_handler)
+# Debug router logs also go to a file
+debug_logger = logging.getLogger("betty_debug")
+debug_log_queue = queue.SimpleQueue()
+debug_handler = QueueHandler(debug_log_queue)
+debug_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+debug_logger.addHandler(debug_handler)
+debug_log_listener = QueueListener(debug_log_queue, logging.FileHandler('debug_logs.txt'))
+debug_log_listener.start()
 
 # Debug router models
 class DebugLog(BaseModel):
@@ -47,16 +68,16 @@ class DebugLog(BaseModel):
 # Import our custom modules
 from services.firebase_service import FirebaseService
 from services.auth_service import AuthService
-from services.document_service import DocumentService
+from services.document_service import DocumentService, MarkdownToGoogleDocsConverter
 from services.ai_service import AIService
 from services.planner_service import PlannerService
 from services.google_service import GoogleService
-from services.profile_service import ProfileService
+from services.profile_service import ProfileService, MAX_AVATAR_BYTES
 from models.user_models import (
     UserCreate, UserResponse, UserUpdate, ProfileStats, 
     NotificationSettings, UserPreferences
 )
-from models.document_models import DocumentCreate, DocumentResponse, DocumentUpdate, DocumentGenerationRequest, FormattedGoogleDocRequest
+from models.document_models import DocumentCreate, DocumentResponse, DocumentSummary, DocumentUpdate, DocumentGenerationRequest, FormattedGoogleDocRequest
 from models.chat_models import ChatMessage, ChatResponse, EnhancedChatResponse, EnhancedChatMessage
 from models.planner_models import (
     TaskCreate, TaskResponse, TaskUpdate, TaskStatus, TaskPriority,
@@ -70,6 +91,7 @@ from services.enhanced_planner_service import EnhancedPlannerService
 #Import routes
 from routes.planner_routes import router as planner_router
 from routes.auth_routes import router as auth_router
+from errors import NotFoundError
 
 # Initialize services
 firebase_service = FirebaseService()
@@ -80,6 +102,54 @@ ai_service = AIService(firebase_service)
 planner_service = PlannerService(firebase_service)
 profile_service = ProfileService(firebase_service, auth_service)
 enhanced_planner_service = EnhancedPlannerService(firebase_service, google_service)
+markdown_converter = MarkdownToGoogleDocsConverter()  # stateless, shared by all requests
+
+# Shared HTTP client for outbound Google API calls. Keeping connections alive
+# (and multiplexed over HTTP/2) lets the OAuth callback reuse TLS sessions.
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(keepalive_expiry=300)
+)
+
+# Google OAuth client settings, read once at startup rather than per request
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
+
+GOOGLE_API_HOSTS = [
+    "https://oauth2.googleapis.com/",
+    "https://www.googleapis.com/",
+    "https://docs.googleapis.com/",
+    "https://generativelanguage.googleapis.com/",
+]
+
+async def warm_http_client():
+    """Open connections to the Google API hosts before the first request needs them"""
+    async def _warm(url: str):
+        try:
+            await http_client.get(url, timeout=2)
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️  Could not pre-connect to {url}: {e}")
+
+    await asyncio.gather(*(_warm(url) for url in GOOGLE_API_HOSTS))
+
+# Writes a response doesn't wait for. Tasks are kept here (asyncio only holds
+# weak references) and drained on shutdown so they aren't cut off mid-write.
+background_writes = set()
+
+def spawn_background_write(coro, description: str) -> asyncio.Task:
+    """Run a write after the response is sent; failures are logged, not lost"""
+    task = asyncio.create_task(coro)
+    background_writes.add(task)
+    
+    def _on_done(done: asyncio.Task):
+        background_writes.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            logger.error(f"❌ Background write failed ({description})", exc_info=done.exception())
+    
+    task.add_done_callback(_on_done)
+    return task
 
 security = HTTPBearer()
 
@@ -88,27 +158,39 @@ security = HTTPBearer()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 Betty Backend starting up...")
+    logger.info("🚀 Betty Backend starting up...")
     
     # Create uploads directory if it doesn't exist
     os.makedirs("uploads/avatars", exist_ok=True)
-    print("✅ Upload directories created")
+    logger.info("✅ Upload directories created")
     
     try:
         firebase_service.initialize()
-        print("✅ Firebase initialized")
+        logger.info("✅ Firebase initialized")
     except Exception as e:
-        print(f"⚠️  Firebase initialization failed: {e}")
-        print("The app will continue but Firebase features may not work")
+        logger.exception(f"⚠️  Firebase initialization failed: {e}. The app will continue but Firebase features may not work")
+    
+    await warm_http_client()
+    logger.info("✅ HTTP connections to Google APIs warmed up")
     yield
     # Shutdown
-    print("👋 Betty Backend shutting down...")
+    logger.info("👋 Betty Backend shutting down...")
+    if background_writes:
+        logger.info(f"⏳ Waiting for {len(background_writes)} background write(s)...")
+        await asyncio.gather(*background_writes, return_exceptions=True)
+    await http_client.aclose()
+    google_service.close()
+    # Flush whatever is still queued
+    debug_log_listener.stop()
+    log_listener.stop()
 
 app = FastAPI(
     title="Betty - Office Genius API",
     description="Backend API for Betty, your AI-powered office assistant",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson for every JSON response (dashboard and list payloads are the big ones)
+    default_response_class=ORJSONResponse
 )
 
 app.include_router(planner_router)
@@ -116,6 +198,51 @@ app.include_router(auth_router)
 # Mount static files for serving uploaded images
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+# Errors many routes share are answered here once instead of in a try/except
+# in every endpoint. Anything else is a plain 500 and is logged by the server.
+FIRESTORE_ERROR_RESPONSES = {
+    gexc.NotFound: (status.HTTP_404_NOT_FOUND, "Not found"),
+    gexc.PermissionDenied: (status.HTTP_403_FORBIDDEN, "Access denied"),
+    gexc.DeadlineExceeded: (status.HTTP_504_GATEWAY_TIMEOUT, "Database request timed out"),
+}
+
+@app.exception_handler(NotFoundError)
+async def not_found_error_handler(request: Request, exc: NotFoundError):
+    return ORJSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": str(exc)})
+
+async def firestore_error_handler(request: Request, exc: gexc.GoogleAPICallError):
+    status_code, detail = FIRESTORE_ERROR_RESPONSES[type(exc)]
+    return ORJSONResponse(status_code=status_code, content={"detail": detail})
+
+for firestore_error in FIRESTORE_ERROR_RESPONSES:
+    app.add_exception_handler(firestore_error, firestore_error_handler)
+
+# Avatar uploads are refused from their Content-Length, before the multipart body
+# is spooled; the slack covers the boundary and part headers around the image
+AVATAR_UPLOAD_PATH = "/profile/upload-avatar"
+AVATAR_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+class AvatarUploadSizeLimitMiddleware:
+    """Reject oversized avatar uploads with 413 without reading the request body"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == AVATAR_UPLOAD_PATH:
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > MAX_AVATAR_BYTES + AVATAR_MULTIPART_OVERHEAD_BYTES:
+                response = ORJSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": f"Avatar must be at most {MAX_AVATAR_BYTES // (1024 * 1024)} MB"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Added before CORS so the 413 still carries CORS headers
+app.add_middleware(AvatarUploadSizeLimitMiddleware)
+
 # CORS middleware
 allowed_origins = [
     "http://localhost:3000",      # React web apps
@@ -134,21 +261,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Compress larger JSON bodies (dashboard, document lists, debug dumps) for mobile clients.
+# Level 5 keeps nearly all of level 9's ratio on JSON for a fraction of the CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
-# Security
-security = HTTPBearer()
 
 # Import get_current_user from auth module to avoid duplication
-from auth import get_current_user
+from auth import get_current_user, get_current_user_profile
+from conditional_get import conditional_json_response, etag_matches
+from pagination import encode_cursor, decode_cursor
 
-async def get_admin_user(current_user = Depends(get_current_user)):
+async def get_admin_user(
+    current_user = Depends(get_current_user),
+    user_profile = Depends(get_current_user_profile)
+):
     """Ensure the current user has admin privileges"""
     try:
-        # Check if user is admin (you might have an 'is_admin' field or specific admin UIDs)
-        user_profile = await firebase_service.get_user_profile(current_user["uid"])
+        # Check if user is admin (you might have an 'is_admin' field or specific admin UIDs).
+        # The profile is the one authentication just loaded.
         
         if not user_profile:
             raise HTTPException(status_code=403, detail="User profile not found")
@@ -244,21 +378,21 @@ async def receive_debug_log(
         
         # Log to console and file based on level
         if log_data.level == "error":
-            logger.error(log_message)
+            debug_logger.error(log_message)
         elif log_data.level == "info":
-            logger.info(log_message)
+            debug_logger.info(log_message)
         elif log_data.level == "debug":
-            logger.debug(log_message)
+            debug_logger.debug(log_message)
         else:
-            logger.info(log_message)
+            debug_logger.info(log_message)
         
         # Also print to console for immediate visibility
-        print(f"🐛 DEBUG [{log_data.timestamp}] [{user.get('email', 'unknown')}] {log_message}")
+        logger.info(f"🐛 DEBUG [{log_data.timestamp}] [{user.get('email', 'unknown')}] {log_message}")
         
         return {"status": "logged", "timestamp": datetime.utcnow().isoformat()}
         
     except Exception as e:
-        print(f"❌ Error logging debug message: {e}")
+        logger.exception(f"❌ Error logging debug message: {e}")
         return {"status": "error", "error": str(e)}
 
 @debug_router.get("/logs")
@@ -352,7 +486,6 @@ async def connect_google_native(
 
         # Validate access token with Google
         try:
-            import requests
             userinfo_response = requests.get(
                 'https://www.googleapis.com/oauth2/v2/userinfo',
                 headers={'Authorization': f'Bearer {access_token}'},
@@ -396,6 +529,7 @@ async def connect_google_native(
         }
         
         firebase_service.db.collection('users').document(user_uid).update(update_data)
+        firebase_service.invalidate_user_profile(user_uid)
         
         # Store in google_tokens collection with additional metadata
         firebase_service.db.collection('google_tokens').document(user_uid).set({
@@ -411,7 +545,7 @@ async def connect_google_native(
             'created_at': firestore.SERVER_TIMESTAMP,
             'updated_at': firestore.SERVER_TIMESTAMP,
             # Add client info for credential creation
-            'client_id': os.getenv('GOOGLE_CLIENT_ID'),
+            'client_id': GOOGLE_CLIENT_ID,
             'token_uri': 'https://oauth2.googleapis.com/token',
             'scopes': [
                 'https://www.googleapis.com/auth/calendar.readonly',
@@ -435,9 +569,9 @@ async def connect_google_native(
 
 
 @app.get("/profile/me", response_model=UserResponse)
-async def get_my_profile(user=Depends(get_current_user)):
-    """Get current user's profile information"""
-    return UserResponse(**user)
+async def get_my_profile(request: Request, user=Depends(get_current_user)):
+    """Get current user's profile information (the profile comes from the auth cache)"""
+    return conditional_json_response(request, UserResponse.model_validate(user))
 
 @app.put("/profile/me", response_model=UserResponse)
 async def update_my_profile(
@@ -457,22 +591,33 @@ async def update_my_profile(
             detail=str(e)
         )
 
-@app.post("/profile/upload-avatar")
+@app.post(AVATAR_UPLOAD_PATH)
 async def upload_avatar(
     file: UploadFile = File(...),
     user=Depends(get_current_user)
 ):
     """Upload user avatar image"""
-    if not file.content_type.startswith('image/'):
+    # Starlette records the size while spooling the upload, so this costs nothing
+    # (catches chunked uploads that had no Content-Length for the middleware to check)
+    if file.size is not None and file.size > MAX_AVATAR_BYTES:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be an image"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Avatar must be at most {MAX_AVATAR_BYTES // (1024 * 1024)} MB"
+        )
+    
+    # Judge the format from the file's bytes; content_type is whatever the client sent
+    file_extension = profile_service.detect_image_extension(file)
+    if not file_extension:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="File must be a JPEG, PNG, GIF, WebP or HEIC image"
         )
     
     try:
         avatar_url = await profile_service.upload_avatar(
             user["uid"], 
-            file
+            file,
+            file_extension=file_extension
         )
         return {"avatar_url": avatar_url}
     except Exception as e:
@@ -482,10 +627,13 @@ async def upload_avatar(
         )
 
 @app.get("/profile/stats", response_model=ProfileStats)
-async def get_profile_stats(user=Depends(get_current_user)):
+async def get_profile_stats(
+    user=Depends(get_current_user),
+    user_profile=Depends(get_current_user_profile)
+):
     """Get user's activity statistics"""
     try:
-        stats = await profile_service.get_user_stats(user["uid"])
+        stats = await profile_service.get_user_stats(user["uid"], user_profile=user_profile)
         return stats
     except Exception as e:
         raise HTTPException(
@@ -494,11 +642,15 @@ async def get_profile_stats(user=Depends(get_current_user)):
         )
 
 @app.get("/profile/notifications", response_model=NotificationSettings)
-async def get_notification_settings(user=Depends(get_current_user)):
+async def get_notification_settings(
+    request: Request,
+    user=Depends(get_current_user),
+    user_profile=Depends(get_current_user_profile)
+):
     """Get user's notification preferences"""
     try:
-        settings = await profile_service.get_notification_settings(user["uid"])
-        return settings
+        settings = await profile_service.get_notification_settings(user["uid"], user_profile=user_profile)
+        return conditional_json_response(request, settings)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -524,11 +676,15 @@ async def update_notification_settings(
         )
 
 @app.get("/profile/preferences", response_model=UserPreferences)
-async def get_user_preferences(user=Depends(get_current_user)):
+async def get_user_preferences(
+    request: Request,
+    user=Depends(get_current_user),
+    user_profile=Depends(get_current_user_profile)
+):
     """Get user's app preferences"""
     try:
-        preferences = await profile_service.get_user_preferences(user["uid"])
-        return preferences
+        preferences = await profile_service.get_user_preferences(user["uid"], user_profile=user_profile)
+        return conditional_json_response(request, preferences)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -570,18 +726,15 @@ async def delete_account(user=Depends(get_current_user)):
 # ============================================================================
 
 @app.get("/auth/google/connect")
-async def get_google_oauth_url(user=Depends(get_current_user)):
+async def get_google_oauth_url(request: Request, user=Depends(get_current_user)):
     """
     Get Google OAuth URL for web-based authentication
     """
     try:
-        import urllib.parse
-        from urllib.parse import urlencode
-        
         # Google OAuth 2.0 parameters
         oauth_params = {
-            'client_id': os.getenv('GOOGLE_CLIENT_ID'),
-            'redirect_uri': os.getenv('GOOGLE_REDIRECT_URI', f"{request.base_url}auth/google/callback"),
+            'client_id': GOOGLE_CLIENT_ID,
+            'redirect_uri': GOOGLE_REDIRECT_URI or f"{request.base_url}auth/google/callback",
             'scope': ' '.join([
                 'openid',
                 'profile',
@@ -610,56 +763,55 @@ async def get_google_oauth_url(user=Depends(get_current_user)):
             detail=f"Failed to generate OAuth URL: {str(e)}"
         )
 
+GOOGLE_AUTH_SUCCESS_URL = "bettyapp://google-auth-success"
+GOOGLE_AUTH_ERROR_URL = "bettyapp://google-auth-error"
+
+def google_auth_error_redirect(reason: str) -> RedirectResponse:
+    """Send the browser back to the app's OAuth error deep link"""
+    return RedirectResponse(
+        url=f"{GOOGLE_AUTH_ERROR_URL}?{urlencode({'reason': reason})}",
+        status_code=status.HTTP_302_FOUND
+    )
+
 @app.get("/auth/google/callback")
 async def google_oauth_callback(code: str = None, state: str = None, error: str = None):
     """
-    Handle Google OAuth callback
+    Handle Google OAuth callback by redirecting the browser straight to the app's deep link
     """
     try:
         if error:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"OAuth error: {error}"
-            )
+            return google_auth_error_redirect(error)
         
         if not code or not state:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Missing authorization code or state"
-            )
+            return google_auth_error_redirect("missing_code_or_state")
         
         # Exchange authorization code for tokens
-        import requests
-        
         token_data = {
-            'client_id': os.getenv('GOOGLE_CLIENT_ID'),
-            'client_secret': os.getenv('GOOGLE_CLIENT_SECRET'),
+            'client_id': GOOGLE_CLIENT_ID,
+            'client_secret': GOOGLE_CLIENT_SECRET,
             'code': code,
             'grant_type': 'authorization_code',
-            'redirect_uri': os.getenv('GOOGLE_REDIRECT_URI')
+            'redirect_uri': GOOGLE_REDIRECT_URI
         }
         
-        token_response = requests.post(
+        token_response = await http_client.post(
             'https://oauth2.googleapis.com/token',
             data=token_data
         )
         
-        if not token_response.ok:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to exchange authorization code"
-            )
+        if not token_response.is_success:
+            return google_auth_error_redirect("token_exchange_failed")
         
         tokens = token_response.json()
         access_token = tokens.get('access_token')
         
         # Get user info from Google
-        user_info_response = requests.get(
+        user_info_response = await http_client.get(
             'https://www.googleapis.com/oauth2/v2/userinfo',
             headers={'Authorization': f'Bearer {access_token}'}
         )
         
-        if user_info_response.ok:
+        if user_info_response.is_success:
             user_info = user_info_response.json()
         else:
             user_info = {}
@@ -667,6 +819,7 @@ async def google_oauth_callback(code: str = None, state: str = None, error: str
         # Store tokens for the user (state contains uid)
         uid = state
         user_ref = firebase_service.get_user_document_ref(uid)
+        now = datetime.now(timezone.utc)
         
         update_data = {
             'google_access_token': access_token,
@@ -674,27 +827,22 @@ async def google_oauth_callback(code: str = None, state: str = None, error: str
             'google_id_token': tokens.get('id_token'),
             'google_user_info': user_info,
             'google_connected': True,
-            'google_connected_at': datetime.now(timezone.utc),
-            'updated_at': datetime.now(timezone.utc)
+            'google_connected_at': now,
+            'updated_at': now
         }
         
         user_ref.update(update_data)
+        firebase_service.invalidate_user_profile(uid)
         
-        # Redirect to app with success message
-        return {
-            "success": True,
-            "message": "Google account connected successfully!",
-            "redirect_url": "bettyapp://google-auth-success"  # Deep link to your app
-        }
+        # Hand off to the app via its deep link
+        return RedirectResponse(
+            url=f"{GOOGLE_AUTH_SUCCESS_URL}?{urlencode({'uid': uid})}",
+            status_code=status.HTTP_302_FOUND
+        )
         
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"OAuth callback error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"OAuth callback failed: {str(e)}"
-        )
+        return google_auth_error_redirect("server_error")
 
 
 @app.post("/auth/google/disconnect")
@@ -712,6 +860,7 @@ async def disconnect_google(current_user = Depends(get_current_user)):
             'google_tokens': firestore.DELETE_FIELD,
             'updated_at': firestore.SERVER_TIMESTAMP
         })
+        firebase_service.invalidate_user_profile(user_uid)
         
         # Delete from google_tokens collection
         firebase_service.db.collection('google_tokens').document(user_uid).delete()
@@ -794,12 +943,13 @@ async def store_google_tokens(
         
         # Update user profile in Firestore with Google tokens
         user_ref = firebase_service.get_user_document_ref(uid)
+        now = datetime.now(timezone.utc)
         
         update_data = {
             'google_access_token': access_token,
             'google_connected': True,
-            'google_connected_at': datetime.now(timezone.utc),
-            'updated_at': datetime.now(timezone.utc)
+            'google_connected_at': now,
+            'updated_at': now
         }
         
         if id_token:
@@ -810,6 +960,7 @@ async def store_google_tokens(
         
         # Update the user document
         user_ref.update(update_data)
+        firebase_service.invalidate_user_profile(uid)
         
         logger.info(f"Google tokens stored successfully for user {uid}")
         return {
@@ -832,6 +983,9 @@ async def store_google_tokens(
 # GOOGLE DRIVE/DOCS ROUTES
 # ============================================================================
 
+# Tags stripped when exporting HTML documents as plain text
+HTML_TAG_PATTERN = re.compile('<[^<]+?>')
+
 @app.post("/documents/export/google-docs")
 async def export_to_google_docs(
     request: dict,
@@ -863,9 +1017,6 @@ async def export_to_google_docs(
         document_format = request.get('format', 'html')
         
         # Create Google Doc using Google Docs API
-        import requests
-        import json
-        
         # Step 1: Create empty document
         create_doc_url = 'https://docs.googleapis.com/v1/documents'
         create_doc_data = {
@@ -897,15 +1048,13 @@ async def export_to_google_docs(
         document_id = doc_data['documentId']
         
         # Step 2: Insert content into document
-        if document_content.strip():
+        if document_content and not document_content.isspace():
             batch_update_url = f'https://docs.googleapis.com/v1/documents/{document_id}:batchUpdate'
             
             # Convert HTML to plain text if needed
             if document_format == 'html':
-                from html import unescape
-                import re
                 # Simple HTML to text conversion
-                content_text = re.sub('<[^<]+?>', '', document_content)
+                content_text = HTML_TAG_PATTERN.sub('', document_content)
                 content_text = unescape(content_text)
             else:
                 content_text = document_content
@@ -1129,9 +1278,9 @@ async def send_chat_message(
     try:
         user_id = user["uid"]
         
-        print(f"📥 Received message: '{message.content[:50]}...'")
-        print(f"📥 Conversation ID from query: {conversation_id}")
-        print(f"📥 Conversation ID from message: {getattr(message, 'conversation_id', None)}")
+        logger.info(f"📥 Received message: '{message.content[:50]}...'")
+        logger.info(f"📥 Conversation ID from query: {conversation_id}")
+        logger.info(f"📥 Conversation ID from message: {getattr(message, 'conversation_id', None)}")
         
         # Get or create conversation - handle both query param and message body
         final_conversation_id = None
@@ -1139,22 +1288,22 @@ async def send_chat_message(
         if conversation_id:
             # Use conversation_id from query parameter (preferred)
             final_conversation_id = conversation_id
-            print(f"✅ Using conversation ID from query: {final_conversation_id}")
+            logger.info(f"✅ Using conversation ID from query: {final_conversation_id}")
         elif hasattr(message, 'conversation_id') and message.conversation_id:
             # Use conversation_id from message body
             final_conversation_id = message.conversation_id
-            print(f"✅ Using conversation ID from message body: {final_conversation_id}")
+            logger.info(f"✅ Using conversation ID from message body: {final_conversation_id}")
         else:
             # Create new conversation
             final_conversation_id = await ai_service.create_conversation_session_indexed(user_id)
-            print(f"✅ Created new conversation: {final_conversation_id}")
+            logger.info(f"✅ Created new conversation: {final_conversation_id}")
         
         # Process message with AI - pass conversation_id explicitly
-        print(f"🔄 Processing message with AI...")
+        logger.info("🔄 Processing message with AI...")
         response = await ai_service.process_message(message, user_id, final_conversation_id)
         
         # Enhanced: Save messages and update indexes automatically
-        print(f"💾 Saving chat messages...")
+        logger.info("💾 Saving chat messages...")
         await firebase_service.save_chat_messages_with_indexes(
             user_id=user_id,
             conversation_id=final_conversation_id,
@@ -1164,34 +1313,38 @@ async def send_chat_message(
         
         # If AI created a document, save it with indexing
         if response.document_created:
-            print(f"📄 Creating document: {response.document_title}")
+            logger.info(f"📄 Creating document: {response.document_title}")
             doc_data = DocumentCreate(
                 title=response.document_title,
                 content=response.document_content,
                 document_type="ai_generated"
             )
-            # Use indexed document creation
-            doc_id = await firebase_service.create_document_with_index(
-                collection="documents",
-                data=doc_data.dict(),
-                user_id=user_id,
-                index_type="document_ids"
+            # Use indexed document creation. The id is chosen here so the response
+            # can carry it without waiting for the write to finish.
+            doc_id = str(uuid.uuid4())
+            spawn_background_write(
+                firebase_service.create_document_with_index(
+                    collection="documents",
+                    data={**doc_data.model_dump(), "user_id": user_id},
+                    user_id=user_id,
+                    index_type="document_ids",
+                    doc_id=doc_id
+                ),
+                f"document {doc_id}"
             )
             response.document_id = doc_id
         
         # Add conversation_id to response for frontend
         response.conversation_id = final_conversation_id
         
-        print(f"✅ Message processed successfully")
+        logger.info("✅ Message processed successfully")
         return response
         
     except Exception as e:
-        print(f"❌ Chat message error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Chat message error: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/chat/history")
+@app.get("/chat/history", response_class=ORJSONResponse)
 async def get_chat_history(
     limit: int = 50,
     user=Depends(get_current_user)
@@ -1204,14 +1357,22 @@ async def get_chat_history(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/chat/conversations")
+@app.get("/chat/conversations", response_class=ORJSONResponse)
 async def get_user_conversations(
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     user=Depends(get_current_user)
 ):
     """Get user's conversation list - MUCH FASTER WITH INDEXING"""
+    start_after = decode_cursor(cursor) if cursor else None
     try:
-        # Same API signature, but now using indexed approach for speed
-        conversations = await ai_service.get_user_conversations_indexed(user["uid"])
+        # Paged by Firestore cursor; same (updated_at, id) cursor format as /documents
+        conversations = await ai_service.get_user_conversations_indexed(
+            user["uid"], limit=limit, start_after=start_after
+        )
+        if len(conversations) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(conversations[-1])
         return {"conversations": conversations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1227,163 +1388,251 @@ async def create_document(
     user=Depends(get_current_user)
 ):
     """Create a new document - WITH AUTOMATIC INDEXING"""
-    try:
-        # Create document with automatic index update
-        doc_id = await firebase_service.create_document_with_index(
-            collection="documents",
-            data=document.dict(),
-            user_id=user["uid"],
-            index_type="document_ids"
-        )
-        
-        # Return the document in expected format
-        created_doc = await firebase_service.get_document("documents", doc_id)
-        return DocumentResponse(**created_doc)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    data = document.dict()
+    data["user_id"] = user["uid"]
+    
+    # Create document with automatic index update. This fills in id,
+    # created_at and updated_at on `data`, so there is no need to read
+    # the document back to build the response.
+    await firebase_service.create_document_with_index(
+        collection="documents",
+        data=data,
+        user_id=user["uid"],
+        index_type="document_ids"
+    )
+    
+    return DocumentResponse.model_validate(data)
+
+# Fields sent for each document in the list view unless the client asks otherwise
+DOCUMENT_LIST_FIELDS = [name for name in DocumentSummary.model_fields if name != "id"]
 
-@app.get("/documents", response_model=list[DocumentResponse])
-async def get_documents(user=Depends(get_current_user)):
+def parse_document_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Turn the ?fields= query value into a Firestore projection (None means whole documents)"""
+    if fields is None:
+        return DOCUMENT_LIST_FIELDS
+    if fields.strip() == "*":
+        return None
+    
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in DocumentResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown document fields: {', '.join(unknown)}")
+    return [name for name in requested if name != "id"]
+
+# Firestore returns these as DatetimeWithNanoseconds, a datetime subclass orjson refuses
+DOCUMENT_TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+def isoformat_document_timestamps(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The documents with their timestamps as ISO strings (copied, so cached dicts are untouched)"""
+    converted = []
+    for document in documents:
+        timestamps = {
+            field: document[field].isoformat()
+            for field in DOCUMENT_TIMESTAMP_FIELDS
+            if isinstance(document.get(field), datetime)
+        }
+        converted.append({**document, **timestamps} if timestamps else document)
+    return converted
+
+# The list is returned as the raw Firestore dicts; DocumentSummary is only used
+# to describe the default payload in the OpenAPI schema. Unset optional fields are
+# left out rather than filled with defaults (like response_model_exclude_none=True).
+# When more documents exist, the X-Next-Cursor header holds the cursor for the next page.
+@app.get(
+    "/documents",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": list[DocumentSummary]}}
+)
+async def get_documents(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or * for whole documents"),
+    page_size: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    user=Depends(get_current_user)
+):
     """Get user documents - MUCH FASTER WITH INDEXING"""
-    try:
+    projection = parse_document_fields(fields)
+    start_after = decode_cursor(cursor) if cursor else None
+    documents = None
+    if projection == DOCUMENT_LIST_FIELDS:
+        # Default list view: one read of the summaries kept on the user doc
+        documents = await firebase_service.get_user_items_from_summaries(
+            uid=user["uid"],
+            index_type="document_ids",
+            limit=page_size,
+            start_after=start_after
+        )
+    
+    if documents is None:
         # Same API, but now uses user's document index for instant retrieval
         documents = await firebase_service.get_user_items_by_index(
             uid=user["uid"],
             collection="documents",
             index_type="document_ids",
-            limit=100  # reasonable limit for mobile
+            limit=page_size,
+            order_by="-updated_at",  # most recent first, ordered by Firestore
+            fields=projection,  # summary fields only; full content via /documents/{id}
+            start_after=start_after
         )
-        
-        # Sort by updated_at (most recent first)
-        documents.sort(key=lambda x: x.get("updated_at", datetime.min), reverse=True)
-        
-        return [DocumentResponse(**doc) for doc in documents]
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Already ordered and limited by Firestore; hand the dicts straight to orjson
+    documents = isoformat_document_timestamps(documents)
+    headers = {}
+    if len(documents) == page_size:
+        headers["X-Next-Cursor"] = encode_cursor(documents[-1])
+    return conditional_json_response(request, documents, headers)
 
 @app.get("/documents/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: str,
+    request: Request,
     user=Depends(get_current_user)
 ):
-    """Get specific document - SAME PERFORMANCE (ALREADY FAST)"""
-    try:
-        document = await document_service.get_document(document_id, user["uid"])
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-        return document
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """Get specific document - supports If-None-Match for unchanged documents"""
+    # The body is validated and encoded once when the document is cached,
+    # so it is sent as-is instead of going through response_model again
+    body, etag = await document_service.get_document_json(document_id, user["uid"])
+    
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# OAuth mobile redirect pages, built once at import time
+MOBILE_REDIRECT_ERROR_HTML_TMPL = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Authentication Error</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+</head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1>Authentication Failed</h1>
+    <p>Error: {error}</p>
+    <p>Please close this window and try again.</p>
+    <script>
+        // Try to close the window after 3 seconds
+        setTimeout(() => {{
+            window.close();
+        }}, 3000);
+    </script>
+</body>
+</html>
+"""
+
+MOBILE_REDIRECT_NO_CODE_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Authentication Error</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+</head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1>Authentication Error</h1>
+    <p>No authorization code received.</p>
+    <p>Please close this window and try again.</p>
+    <script>
+        setTimeout(() => {
+            window.close();
+        }, 3000);
+    </script>
+</body>
+</html>
+"""
+
+# Filled with bytes %-formatting: (escaped code prefix, JS code literal, JS code literal)
+MOBILE_REDIRECT_SUCCESS_HTML_TMPL = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Authentication Successful</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+</head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1>✅ Authentication Successful!</h1>
+    <p>You can now close this window and return to the Betty app.</p>
+    <p>Authorization code: %b...</p>
+    <script>
+        // Try to communicate back to the app if possible
+        if (window.ReactNativeWebView) {
+            window.ReactNativeWebView.postMessage(JSON.stringify({
+                type: 'GOOGLE_AUTH_SUCCESS',
+                code: %b
+            }));
+        }
+        
+        // Auto-close after 5 seconds
+        setTimeout(() => {
+            window.close();
+        }, 5000);
+        
+        // Also try to redirect back to the app
+        setTimeout(() => {
+            // This might work for some mobile browsers
+            window.location.href = 'com.tinashelorenzi.bettyofficegenius://auth/google/success?code=' + encodeURIComponent(%b);
+        }, 1000);
+    </script>
+</body>
+</html>
+""".encode("utf-8")
+
+MOBILE_REDIRECT_SERVER_ERROR_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Server Error</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+</head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1>Server Error</h1>
+    <p>Something went wrong.</p>
+    <p>Please close this window and try again.</p>
+</body>
+</html>
+"""
+
+# Static pages are encoded once so responses can send the bytes as-is
+MOBILE_REDIRECT_NO_CODE_HTML_BYTES = MOBILE_REDIRECT_NO_CODE_HTML.encode("utf-8")
+MOBILE_REDIRECT_SERVER_ERROR_HTML_BYTES = MOBILE_REDIRECT_SERVER_ERROR_HTML.encode("utf-8")
+
+def script_literal(value: str) -> str:
+    """Encode a value as a JS string literal that is safe inside a <script> block"""
+    return json.dumps(value).replace("<", "\\u003c")
+
+def static_html_response(content: bytes, status_code: int) -> Response:
+    """Return pre-encoded HTML without re-encoding it per request"""
+    return Response(content=content, media_type="text/html; charset=utf-8", status_code=status_code)
+
+def mobile_redirect_error_response(error: str) -> Response:
+    """OAuth provider reported an error"""
+    error_html = MOBILE_REDIRECT_ERROR_HTML_TMPL.format_map({"error": escape(error, quote=True)})
+    return HTMLResponse(content=error_html, status_code=400)
+
+def mobile_redirect_no_code_response() -> Response:
+    """Callback arrived without an authorization code"""
+    return static_html_response(MOBILE_REDIRECT_NO_CODE_HTML_BYTES, 400)
+
+def mobile_redirect_success_response(code: str) -> Response:
+    """Show a page that can be closed and hands the code back to the app"""
+    js_code = script_literal(code).encode("utf-8")
+    code_prefix = escape(code[:10], quote=True).encode("utf-8")
+    success_html = MOBILE_REDIRECT_SUCCESS_HTML_TMPL % (code_prefix, js_code, js_code)
+    return static_html_response(success_html, 200)
 
 @app.get("/auth/google/mobile-redirect")
 async def google_mobile_redirect(code: str = None, state: str = None, error: str = None):
     """Handle Google OAuth mobile redirect from Serveo tunnel"""
     try:
         if error:
-            # Handle OAuth error
-            error_html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Authentication Error</title>
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-            </head>
-            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                <h1>Authentication Failed</h1>
-                <p>Error: {error}</p>
-                <p>Please close this window and try again.</p>
-                <script>
-                    // Try to close the window after 3 seconds
-                    setTimeout(() => {{
-                        window.close();
-                    }}, 3000);
-                </script>
-            </body>
-            </html>
-            """
-            return HTMLResponse(content=error_html, status_code=400)
-        
+            return mobile_redirect_error_response(error)
         if not code:
-            # No code provided
-            error_html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Authentication Error</title>
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-            </head>
-            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                <h1>Authentication Error</h1>
-                <p>No authorization code received.</p>
-                <p>Please close this window and try again.</p>
-                <script>
-                    setTimeout(() => {
-                        window.close();
-                    }, 3000);
-                </script>
-            </body>
-            </html>
-            """
-            return HTMLResponse(content=error_html, status_code=400)
-        
-        # Success - show a page that can be closed
-        success_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Authentication Successful</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1">
-        </head>
-        <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-            <h1>✅ Authentication Successful!</h1>
-            <p>You can now close this window and return to the Betty app.</p>
-            <p>Authorization code: {code[:10]}...</p>
-            <script>
-                // Try to communicate back to the app if possible
-                if (window.ReactNativeWebView) {{
-                    window.ReactNativeWebView.postMessage(JSON.stringify({{
-                        type: 'GOOGLE_AUTH_SUCCESS',
-                        code: '{code}'
-                    }}));
-                }}
-                
-                // Auto-close after 5 seconds
-                setTimeout(() => {{
-                    window.close();
-                }}, 5000);
-                
-                // Also try to redirect back to the app
-                setTimeout(() => {{
-                    // This might work for some mobile browsers
-                    window.location.href = 'com.tinashelorenzi.bettyofficegenius://auth/google/success?code={code}';
-                }}, 1000);
-            </script>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=success_html)
+            return mobile_redirect_no_code_response()
+        return mobile_redirect_success_response(code)
         
     except Exception as e:
-        print(f"Error in mobile redirect: {e}")
-        error_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Server Error</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1">
-        </head>
-        <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-            <h1>Server Error</h1>
-            <p>Something went wrong: {str(e)}</p>
-            <p>Please close this window and try again.</p>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=error_html, status_code=500)
+        logger.exception(f"Error in mobile redirect: {e}")
+        return static_html_response(MOBILE_REDIRECT_SERVER_ERROR_HTML_BYTES, 500)
 
 @app.post("/auth/google/mobile-callback")
 async def google_mobile_oauth_callback(
@@ -1414,13 +1663,10 @@ async def update_document(
     user=Depends(get_current_user)
 ):
     """Update document - SAME API"""
-    try:
-        updated_document = await document_service.update_document(
-            document_id, document, user["uid"]
-        )
-        return updated_document
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    updated_document = await document_service.update_document(
+        document_id, document, user["uid"]
+    )
+    return updated_document
 
 @app.delete("/documents/{document_id}")
 async def delete_document(
@@ -1428,71 +1674,120 @@ async def delete_document(
     user=Depends(get_current_user)
 ):
     """Delete document - WITH AUTOMATIC INDEX CLEANUP"""
-    try:
-        # Enhanced: Remove from document collection AND user index
-        success = await firebase_service.delete_document_with_index(
-            collection="documents",
-            doc_id=document_id,
-            user_id=user["uid"],
-            index_type="document_ids"
-        )
-        
-        if not success:
-            raise HTTPException(status_code=404, detail="Document not found")
-            
-        return {"message": "Document deleted successfully"}
+    # Enhanced: Remove from document collection AND user index; another user's
+    # document (or a missing one) is refused and answered with a 404
+    success = await firebase_service.delete_document_with_index(
+        collection="documents",
+        doc_id=document_id,
+        user_id=user["uid"],
+        index_type="document_ids"
+    )
+    document_service.invalidate_document(document_id)
+    
+    if not success:
+        raise NotFoundError("Document not found")
         
-    except HTTPException:
-        raise
+    return {"message": "Document deleted successfully"}
+
+# ============================================================================
+# BACKGROUND GOOGLE DOCS JOBS
+# ============================================================================
+
+JOBS_COLLECTION = "jobs"
+
+async def create_google_doc_job(uid: str, job_type: str, title: str) -> str:
+    """Record a pending Google Docs job the client can poll via /jobs/{job_id}"""
+    return await firebase_service.create_document(JOBS_COLLECTION, {
+        "user_id": uid,
+        "type": job_type,
+        "title": title,
+        "status": "pending",
+        "result": None,
+        "error": None
+    })
+
+async def run_create_google_doc_job(job_id: str, uid: str, title: str, content: str):
+    """Background task: create the Google Doc and store the outcome on the job"""
+    try:
+        result = await google_service.create_google_doc(uid, title, content)
+        await firebase_service.update_document(JOBS_COLLECTION, job_id, {
+            "status": "success",
+            "result": {
+                "document_id": result["document_id"],
+                "document_url": result["document_url"],
+                "title": title
+            }
+        })
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.exception(f"❌ Google Doc job {job_id} failed: {e}")
+        await firebase_service.update_document(JOBS_COLLECTION, job_id, {
+            "status": "failed",
+            "error": str(e)
+        })
 
-@app.post("/documents/{document_id}/export-google")
+@app.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    user=Depends(get_current_user)
+):
+    """Poll a background job started by one of the Google export routes"""
+    job = await firebase_service.get_document(JOBS_COLLECTION, job_id)
+    if not job or job.get("user_id") != user["uid"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/documents/{document_id}/export-google", status_code=status.HTTP_202_ACCEPTED)
 async def export_document_to_google(
     document_id: str,
+    background_tasks: BackgroundTasks,
     user=Depends(get_current_user)
 ):
-    """Export document to Google Docs"""
+    """Export document to Google Docs in the background; poll /jobs/{job_id} for the result"""
     try:
         document = await document_service.get_document(document_id, user["uid"])
-        result = await google_service.create_google_doc(
-            user["uid"], document.title, document.content
+        job_id = await create_google_doc_job(user["uid"], "export_document", document.title)
+        background_tasks.add_task(
+            run_create_google_doc_job, job_id, user["uid"], document.title, document.content
         )
-        return result
+        return {"job_id": job_id, "status": "pending", "status_url": f"/jobs/{job_id}"}
+    except gexc.NotFound:
+        raise HTTPException(status_code=404, detail="Document not found")
+    except gexc.PermissionDenied:
+        raise HTTPException(status_code=403, detail="Access denied")
+    except gexc.DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Database request timed out")
     except Exception as e:
+        logger.exception("Failed to start export of document %s", document_id)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/google/drive/create-doc")
+@app.post("/google/drive/create-doc", status_code=status.HTTP_202_ACCEPTED)
 async def create_google_drive_doc(
     request: dict,
+    background_tasks: BackgroundTasks,
     user=Depends(get_current_user)
 ):
-    """Create a Google Doc in Drive with the provided content"""
+    """Create a Google Doc in Drive in the background; poll /jobs/{job_id} for the result
+    
+    POST /google/create-doc still creates the document synchronously.
+    """
     try:
         title = request.get("title", "Untitled Document")
         content = request.get("content", "")
         
-        result = await google_service.create_google_doc(
-            user["uid"], 
-            title, 
-            content
-        )
+        job_id = await create_google_doc_job(user["uid"], "create_doc", title)
+        background_tasks.add_task(run_create_google_doc_job, job_id, user["uid"], title, content)
         
         return {
             "success": True,
-            "document_id": result["document_id"],
-            "document_url": result["document_url"],
+            "job_id": job_id,
+            "status": "pending",
+            "status_url": f"/jobs/{job_id}",
             "title": title,
-            "message": "Document created successfully in Google Drive"
+            "message": "Document creation started"
         }
         
-    except ValueError as e:
-        raise HTTPException(
-            status_code=400, 
-            detail="Google account not connected. Please connect your Google account first."
-        )
     except Exception as e:
-        print(f"Error creating Google Doc: {e}")
+        logger.exception(f"Error starting Google Doc creation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1513,7 +1808,7 @@ async def create_task(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/planner/tasks", response_model=list[TaskResponse])
+@app.get("/planner/tasks", response_model=list[TaskResponse], response_class=ORJSONResponse)
 async def get_tasks(user=Depends(get_current_user)):
     """Get user tasks"""
     try:
@@ -1560,7 +1855,7 @@ async def create_note(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/planner/notes", response_model=list[NoteResponse])
+@app.get("/planner/notes", response_model=list[NoteResponse], response_class=ORJSONResponse)
 async def get_notes(user=Depends(get_current_user)):
     """Get user notes"""
     try:
@@ -1610,14 +1905,22 @@ async def export_note_to_google_keep(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/chat/conversations")
+@app.get("/chat/conversations", response_class=ORJSONResponse)
 async def get_user_conversations(
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     user=Depends(get_current_user)
 ):
     """Get user's conversation list - MUCH FASTER WITH INDEXING"""
+    start_after = decode_cursor(cursor) if cursor else None
     try:
-        # Fixed: Use the corrected method signature
-        conversations = await ai_service.get_user_conversations_indexed(user["uid"])
+        # Paged by Firestore cursor; same (updated_at, id) cursor format as /documents
+        conversations = await ai_service.get_user_conversations_indexed(
+            user["uid"], limit=limit, start_after=start_after
+        )
+        if len(conversations) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(conversations[-1])
         return {"conversations": conversations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1672,7 +1975,7 @@ async def get_chat_stats(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/debug/firebase-data")
+@app.get("/debug/firebase-data", response_class=ORJSONResponse)
 async def debug_firebase_data(
     user=Depends(get_current_user)
 ):
@@ -1680,37 +1983,45 @@ async def debug_firebase_data(
     try:
         user_id = user["uid"]
         
-        # Check conversations collection
-        conversations = await firebase_service.query_documents("conversations")
-        user_conversations = [conv for conv in conversations if conv.get("user_id") == user_id]
-        
-        # Check chat_history collection  
-        chat_history = await firebase_service.query_documents("chat_history")
-        user_messages = [msg for msg in chat_history if msg.get("user_id") == user_id]
-        
-        # Check if collections exist at all
-        all_conversations = await firebase_service.query_documents("conversations", limit=5)
-        all_messages = await firebase_service.query_documents("chat_history", limit=5)
+        user_filter = [("user_id", "==", user_id)]
+        
+        # All independent reads, issued together:
+        # conversations and chat_history for this user (counted by Firestore, only
+        # a sample is read), plus samples to check the collections exist at all
+        (
+            user_conversations_count,
+            user_conversations,
+            user_messages_count,
+            user_messages,
+            all_conversations,
+            all_messages
+        ) = await asyncio.gather(
+            firebase_service.count_documents("conversations", filters=user_filter),
+            firebase_service.query_documents("conversations", filters=user_filter, limit=3),
+            firebase_service.count_documents("chat_history", filters=user_filter),
+            firebase_service.query_documents("chat_history", filters=user_filter, limit=3),
+            firebase_service.query_documents("conversations", limit=5),
+            firebase_service.query_documents("chat_history", limit=5)
+        )
         
         debug_info = {
             "user_id": user_id,
             "collections_overview": {
-                "total_conversations_in_db": len(conversations),
-                "total_messages_in_db": len(chat_history),
                 "sample_conversations": all_conversations[:2],  # First 2 for inspection
                 "sample_messages": all_messages[:2]  # First 2 for inspection
             },
             "user_data": {
-                "user_conversations_count": len(user_conversations),
-                "user_messages_count": len(user_messages),
-                "user_conversations": user_conversations[:3],  # First 3 for inspection
-                "user_messages": user_messages[:3]  # First 3 for inspection
+                "user_conversations_count": user_conversations_count,
+                "user_messages_count": user_messages_count,
+                "user_conversations": user_conversations,  # First 3 for inspection
+                "user_messages": user_messages  # First 3 for inspection
             }
         }
         
         return debug_info
         
-    except Exception as e:
+    except (gexc.GoogleAPIError, ValueError) as e:
+        # Firestore/data problems are reported in the body; anything else is a bug and surfaces as a 500
         return {"error": str(e), "message": "Debug failed"}
 
 @app.get("/debug/test-chat-stats")
@@ -1721,33 +2032,38 @@ async def debug_test_chat_stats(
     try:
         user_id = user["uid"]
         
-        # Test each part of the stats calculation
-        conversations_raw = await firebase_service.query_documents(
-            "conversations",
-            filters=[("user_id", "==", user_id)]
-        )
-        
-        messages_raw = await firebase_service.query_documents(
-            "chat_history", 
-            filters=[("user_id", "==", user_id)]
-        )
-        
-        # Test today's messages
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_messages_raw = await firebase_service.query_documents(
-            "chat_history",
-            filters=[
-                ("user_id", "==", user_id),
-                ("timestamp", ">=", today_start)
-            ]
+        user_filter = [("user_id", "==", user_id)]
+        
+        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        # Test each part of the stats calculation (counted by Firestore, one sample
+        # read), including today's messages; the reads are independent so run together
+        (
+            conversations_found,
+            conversations_raw,
+            messages_found,
+            messages_raw,
+            today_messages_found
+        ) = await asyncio.gather(
+            firebase_service.count_documents("conversations", filters=user_filter),
+            firebase_service.query_documents("conversations", filters=user_filter, limit=1),
+            firebase_service.count_documents("chat_history", filters=user_filter),
+            firebase_service.query_documents("chat_history", filters=user_filter, limit=1),
+            firebase_service.count_documents(
+                "chat_history",
+                filters=[
+                    ("user_id", "==", user_id),
+                    ("timestamp", ">=", today_start)
+                ]
+            )
         )
         
         return {
             "user_id": user_id,
             "raw_counts": {
-                "conversations_found": len(conversations_raw),
-                "messages_found": len(messages_raw), 
-                "today_messages_found": len(today_messages_raw)
+                "conversations_found": conversations_found,
+                "messages_found": messages_found, 
+                "today_messages_found": today_messages_found
             },
             "sample_data": {
                 "sample_conversation": conversations_raw[0] if conversations_raw else None,
@@ -1759,16 +2075,19 @@ async def debug_test_chat_stats(
             }
         }
         
-    except Exception as e:
+    except (gexc.GoogleAPIError, ValueError) as e:
         return {"error": str(e), "message": "Chat stats debug failed"}
 
 @app.get("/debug/collections-structure")
-async def debug_collections_structure():
+async def debug_collections_structure(admin_user = Depends(get_admin_user)):
     """Check the overall structure of your Firebase collections"""
     try:
         # Get sample documents from each collection to see structure
-        conversations_sample = await firebase_service.query_documents("conversations", limit=3)
-        messages_sample = await firebase_service.query_documents("chat_history", limit=3)
+        # (query_documents applies limit on the Firestore query, so this is 3 reads each)
+        conversations_sample, messages_sample = await asyncio.gather(
+            firebase_service.query_documents("conversations", limit=3),
+            firebase_service.query_documents("chat_history", limit=3)
+        )
         
         return {
             "conversations_collection": {
@@ -1783,81 +2102,84 @@ async def debug_collections_structure():
             }
         }
         
-    except Exception as e:
+    except (gexc.GoogleAPIError, ValueError) as e:
         return {"error": str(e), "message": "Structure debug failed"}
 
+@app.post("/admin/backfill-schema-version")
+async def backfill_user_schema_version(admin_user = Depends(get_admin_user)):
+    """One-time tagging of users that predate schema_version, so migrations can filter on it"""
+    try:
+        tagged = await firebase_service.backfill_user_schema_versions()
+        return {"message": "Backfill completed", "tagged_users": tagged}
+    except Exception as e:
+        logger.exception(f"❌ Schema version backfill failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Backfill failed: {str(e)}")
+
+# Upper bound on user migrations running against Firebase at once
+MIGRATION_CONCURRENCY = 20
+
 @app.post("/admin/migrate-all-users")
 async def migrate_all_users_to_indexed(admin_user = Depends(get_admin_user)):
     """Migrate all existing users to indexed structure"""
     try:
-        print("🚀 Starting migration of all users to indexed structure...")
+        logger.info("🚀 Starting migration of all users to indexed structure...")
         
-        # Get all users from the users collection
-        all_users = await firebase_service.query_documents("users")
-        print(f"Found {len(all_users)} users to migrate")
+        # Only users Firestore reports as not yet migrated (see /admin/backfill-schema-version
+        # for users created before schema_version existed)
+        all_users = await firebase_service.get_users_needing_migration()
+        logger.info(f"Found {len(all_users)} users to migrate")
         
-        migrated_count = 0
-        failed_count = 0
-        skipped_count = 0
+        # Bounded concurrency instead of a fixed sleep between users, so Firebase
+        # still sees at most MIGRATION_CONCURRENCY migrations at a time
+        semaphore = asyncio.Semaphore(MIGRATION_CONCURRENCY)
+        
+        # Only counters and the first few results are kept, not one entry per user
+        status_counts = {"success": 0, "failed": 0, "skipped": 0}
         migration_results = []
         
-        for user_doc in all_users:
+        async def migrate_and_record(user_doc: Dict[str, Any]) -> None:
+            result = await migrate_user(user_doc)
+            status_counts[result["status"]] += 1
+            if len(migration_results) < 10:
+                migration_results.append(result)
+        
+        async def migrate_user(user_doc: Dict[str, Any]) -> Dict[str, Any]:
             user_id = user_doc.get("uid")
             if not user_id:
-                print(f"⚠️ Skipping user with missing uid: {user_doc.get('id', 'unknown')}")
-                skipped_count += 1
-                continue
+                logger.warning(f"⚠️ Skipping user with missing uid: {user_doc.get('id', 'unknown')}")
+                return {"user_id": None, "status": "skipped", "reason": "missing_uid"}
             
-            try:
-                print(f"🔄 Migrating user: {user_id}")
-                
-                # Check if user already has indexes
-                existing_indexes = user_doc.get("indexes")
-                if existing_indexes and len(existing_indexes.get("conversation_ids", [])) > 0:
-                    print(f"✅ User {user_id} already migrated, skipping...")
-                    skipped_count += 1
-                    migration_results.append({
-                        "user_id": user_id,
-                        "status": "skipped",
-                        "reason": "already_migrated"
-                    })
-                    continue
-                
-                # Perform the migration
-                success = await migrate_single_user(user_id)
-                
-                if success:
-                    migrated_count += 1
-                    migration_results.append({
-                        "user_id": user_id,
-                        "status": "success"
-                    })
-                    print(f"✅ Successfully migrated user {user_id}")
-                else:
-                    failed_count += 1
-                    migration_results.append({
-                        "user_id": user_id,
-                        "status": "failed",
-                        "reason": "migration_function_failed"
-                    })
-                    print(f"❌ Failed to migrate user {user_id}")
-                
-            except Exception as e:
-                print(f"❌ Error migrating user {user_id}: {e}")
-                failed_count += 1
-                migration_results.append({
-                    "user_id": user_id,
-                    "status": "failed",
-                    "reason": str(e)
-                })
+            # Check if user already has indexes
+            existing_indexes = user_doc.get("indexes")
+            if existing_indexes and len(existing_indexes.get("conversation_ids", [])) > 0:
+                logger.info(f"✅ User {user_id} already migrated, skipping...")
+                return {"user_id": user_id, "status": "skipped", "reason": "already_migrated"}
             
-            # Small delay to avoid overwhelming Firebase
-            await asyncio.sleep(0.1)
+            async with semaphore:
+                try:
+                    logger.info(f"🔄 Migrating user: {user_id}")
+                    
+                    # Perform the migration
+                    success = await migrate_single_user(user_id)
+                    
+                    if success:
+                        logger.info(f"✅ Successfully migrated user {user_id}")
+                        return {"user_id": user_id, "status": "success"}
+                    
+                    logger.error(f"❌ Failed to migrate user {user_id}")
+                    return {"user_id": user_id, "status": "failed", "reason": "migration_function_failed"}
+                    
+                except Exception as e:
+                    logger.exception(f"❌ Error migrating user {user_id}: {e}")
+                    return {"user_id": user_id, "status": "failed", "reason": str(e)}
+        
+        await asyncio.gather(*(migrate_and_record(user_doc) for user_doc in all_users))
         
-        print(f"🏁 Migration completed!")
-        print(f"   Migrated: {migrated_count}")
-        print(f"   Failed: {failed_count}")
-        print(f"   Skipped: {skipped_count}")
+        migrated_count = status_counts["success"]
+        failed_count = status_counts["failed"]
+        skipped_count = status_counts["skipped"]
+        
+        logger.info(f"🏁 Migration completed! Migrated: {migrated_count}, failed: {failed_count}, skipped: {skipped_count}")
         
         return {
             "message": "Migration completed",
@@ -1867,12 +2189,12 @@ async def migrate_all_users_to_indexed(admin_user = Depends(get_admin_user)):
                 "failed_migrations": failed_count,
                 "skipped_users": skipped_count
             },
-            "results": migration_results[:10],  # First 10 for brevity
-            "full_results_available": len(migration_results) > 10
+            "results": migration_results,  # First 10 for brevity
+            "full_results_available": (migrated_count + failed_count + skipped_count) > 10
         }
         
     except Exception as e:
-        print(f"❌ Migration process failed: {e}")
+        logger.exception(f"❌ Migration process failed: {e}")
         raise HTTPException(status_code=500, detail=f"Migration failed: {str(e)}")
 
 @app.post("/admin/migrate-user/{user_id}")
@@ -1906,7 +2228,7 @@ async def get_user_dashboard(user=Depends(get_current_user)):
         user_id = user["uid"]
         
         # Get user profile with cached stats (O(1) operation)
-        user_profile = await firebase_service.get_user_profile(user_id)
+        user_profile = await firebase_service.get_user_profile(user_id, use_cache=True)
         
         if not user_profile:
             # Initialize user if they don't exist
@@ -1917,85 +2239,68 @@ async def get_user_dashboard(user=Depends(get_current_user)):
         stats = user_profile.get("stats", {})
         indexes = user_profile.get("indexes", {})
         
-        # Get recent conversations using indexed approach (limited to 5 for dashboard)
-        recent_conversations = []
-        conversation_ids = indexes.get("conversation_ids", [])
-        
-        if conversation_ids:
-            # Get the 5 most recent conversations
-            recent_conv_ids = conversation_ids[:5] if len(conversation_ids) <= 5 else conversation_ids[-5:]
-            
-            for conv_id in reversed(recent_conv_ids):  # Most recent first
-                try:
-                    conv = await firebase_service.get_document("conversations", conv_id)
-                    if conv:
-                        # Add last message preview
-                        recent_messages = await firebase_service.query_documents(
-                            "chat_history",
-                            filters=[
-                                ("user_id", "==", user_id),
-                                ("conversation_id", "==", conv.get("conversation_id"))
-                            ],
-                            order_by="-timestamp",
-                            limit=1
-                        )
-                        
-                        if recent_messages:
-                            last_msg = recent_messages[0]["content"]
-                            conv["last_message"] = last_msg[:100] + "..." if len(last_msg) > 100 else last_msg
-                            conv["last_message_at"] = recent_messages[0]["timestamp"]
-                        else:
-                            conv["last_message"] = "Start chatting..."
-                            conv["last_message_at"] = conv.get("created_at")
-                        
-                        recent_conversations.append(conv)
-                except Exception as e:
-                    print(f"Error loading conversation {conv_id}: {e}")
-                    continue
-        
-        # Get recent documents using indexed approach (limited to 5 for dashboard)
-        recent_documents = []
-        document_ids = indexes.get("document_ids", [])
-        
-        if document_ids:
-            # Get the 5 most recent documents
-            recent_doc_ids = document_ids[:5] if len(document_ids) <= 5 else document_ids[-5:]
-            
-            for doc_id in reversed(recent_doc_ids):  # Most recent first
-                try:
-                    doc = await firebase_service.get_document("documents", doc_id)
-                    if doc:
-                        recent_documents.append(doc)
-                except Exception as e:
-                    print(f"Error loading document {doc_id}: {e}")
-                    continue
-        
-        # Calculate today's messages dynamically (this is the only expensive operation)
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        messages_today = 0
-        
-        try:
-            today_messages = await firebase_service.query_documents(
+        # Most recent 5 of each, newest first (kept on the user doc at write time)
+        recent_conv_ids = firebase_service.recent_ids_from_indexes(indexes, "conversation_ids")
+        recent_doc_ids = firebase_service.recent_ids_from_indexes(indexes, "document_ids")
+        
+        # These reads are independent, so issue them together; each get_many is
+        # a single batched read that keeps the requested (newest first) order.
+        # A failed read degrades its section instead of failing the dashboard.
+        recent_conversations, recent_documents, messages_today = await asyncio.gather(
+            firebase_service.get_many("conversations", recent_conv_ids),
+            firebase_service.get_many("documents", recent_doc_ids),
+            firebase_service.count_messages_today(user_id),
+            return_exceptions=True
+        )
+        failures = [
+            result for result in (recent_conversations, recent_documents, messages_today)
+            if isinstance(result, Exception)
+        ]
+        if isinstance(recent_conversations, Exception):
+            recent_conversations = []
+        if isinstance(recent_documents, Exception):
+            recent_documents = []
+        if isinstance(messages_today, Exception):
+            messages_today = None
+        
+        # Last message preview is stored on the conversation when messages are saved;
+        # only conversations written before that need a chat_history lookup
+        legacy_conversations = [conv for conv in recent_conversations if "last_message" not in conv]
+        last_messages = await asyncio.gather(*[
+            firebase_service.query_documents(
                 "chat_history",
                 filters=[
                     ("user_id", "==", user_id),
-                    ("timestamp", ">=", today_start)
-                ]
+                    ("conversation_id", "==", conv.get("conversation_id"))
+                ],
+                order_by="-timestamp",
+                limit=1
             )
-            messages_today = len(today_messages)
-            
-            # Update cached value for next time
-            await firebase_service.update_user_stats(user_id, {
-                "messages_today": messages_today,
-                "last_activity": datetime.utcnow()
-            })
-            
-        except Exception as e:
-            print(f"Could not calculate today's messages: {e}")
+            for conv in legacy_conversations
+        ], return_exceptions=True)
+        
+        for conv, recent_messages in zip(legacy_conversations, last_messages):
+            if isinstance(recent_messages, Exception):
+                failures.append(recent_messages)
+                recent_messages = []
+            if recent_messages:
+                last_msg = recent_messages[0]["content"]
+                conv["last_message"] = last_msg[:100] + "..." if len(last_msg) > 100 else last_msg
+                conv["last_message_at"] = recent_messages[0]["timestamp"]
+            else:
+                conv["last_message"] = "Start chatting..."
+                conv["last_message_at"] = conv.get("created_at")
+        
+        if failures:
+            # One line for the whole request rather than one per failed read
+            logger.warning(f"⚠️ Dashboard for {user_id}: {len(failures)} read(s) failed, first error: {failures[0]}")
+        
+        if messages_today is None:
             messages_today = stats.get("messages_today", 0)
         
         # Determine user level based on activity
         total_messages = stats.get("total_messages", 0)
+        derived = firebase_service.get_derived_stats(stats)
         user_level = "starter"
         if total_messages > 500:
             user_level = "expert"
@@ -2021,11 +2326,9 @@ async def get_user_dashboard(user=Depends(get_current_user)):
                 "last_activity": stats.get("last_activity"),
                 "last_message_at": stats.get("last_message_at"),
                 
-                # Calculated metrics
-                "avg_messages_per_conversation": (
-                    total_messages / stats.get("total_conversations", 1) if stats.get("total_conversations", 0) > 0 else 0
-                ),
-                "estimated_hours_saved": round(total_messages * 0.1, 1)  # 6 minutes per 10 messages
+                # Calculated metrics (precomputed when the counters are written)
+                "avg_messages_per_conversation": derived["avg_messages_per_conversation"],
+                "estimated_hours_saved": derived["estimated_hours_saved"]
             },
             "recent_activity": {
                 "conversations": recent_conversations,
@@ -2034,7 +2337,7 @@ async def get_user_dashboard(user=Depends(get_current_user)):
             "quick_stats": {
                 "conversations_this_week": 0,  # Could be calculated if needed
                 "documents_this_week": 0,      # Could be calculated if needed
-                "productivity_score": min(100, total_messages),  # Simple score out of 100
+                "productivity_score": derived["productivity_score"],
             },
             "indexes_info": {  # For debugging/admin purposes
                 "conversation_count": len(indexes.get("conversation_ids", [])),
@@ -2047,7 +2350,7 @@ async def get_user_dashboard(user=Depends(get_current_user)):
         return dashboard_data
         
     except Exception as e:
-        print(f"Error getting user dashboard: {e}")
+        logger.exception(f"Error getting user dashboard: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load dashboard: {str(e)}")
 
 # Alternative simpler version if you want just the stats
@@ -2058,7 +2361,7 @@ async def get_user_stats_simple(user=Depends(get_current_user)):
         user_id = user["uid"]
         
         # Get cached stats from user profile
-        user_profile = await firebase_service.get_user_profile(user_id)
+        user_profile = await firebase_service.get_user_profile(user_id, use_cache=True)
         
         if not user_profile:
             return {
@@ -2072,16 +2375,8 @@ async def get_user_stats_simple(user=Depends(get_current_user)):
         stats = user_profile.get("stats", {})
         
         # Update today's messages
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         try:
-            today_messages = await firebase_service.query_documents(
-                "chat_history",
-                filters=[
-                    ("user_id", "==", user_id),
-                    ("timestamp", ">=", today_start)
-                ]
-            )
-            messages_today = len(today_messages)
+            messages_today = await firebase_service.count_messages_today(user_id)
         except:
             messages_today = stats.get("messages_today", 0)
         
@@ -2104,24 +2399,16 @@ async def get_user_profile_with_stats(user=Depends(get_current_user)):
     """Get user profile with embedded stats - optimized for mobile"""
     try:
         user_id = user["uid"]
-        user_profile = await firebase_service.get_user_profile(user_id)
+        user_profile = await firebase_service.get_user_profile(user_id, use_cache=True)
         
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
         
         # Calculate today's messages quickly
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         messages_today = 0
         
         try:
-            today_messages = await firebase_service.query_documents(
-                "chat_history",
-                filters=[
-                    ("user_id", "==", user_id),
-                    ("timestamp", ">=", today_start)
-                ]
-            )
-            messages_today = len(today_messages)
+            messages_today = await firebase_service.count_messages_today(user_id)
         except:
             pass
         
@@ -2143,7 +2430,7 @@ async def get_user_profile_with_stats(user=Depends(get_current_user)):
             "activity_stats": {
                 "tasks_completed": stats.get("total_tasks", 0),
                 "documents_created": stats.get("total_documents", 0),
-                "hours_saved": round(total_messages * 0.1, 1),
+                "hours_saved": firebase_service.get_derived_stats(stats)["estimated_hours_saved"],
                 "ai_chats": stats.get("total_conversations", 0),
                 "total_messages": total_messages,
                 "messages_today": messages_today,
@@ -2154,6 +2441,16 @@ async def get_user_profile_with_stats(user=Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Gemini endpoint for /api/documents/generate, resolved once at import time
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_GENERATE_URL = (
+    f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+    if GEMINI_API_KEY else None
+)
+GEMINI_HEADERS = {'Content-Type': 'application/json'}
+if not GEMINI_API_KEY:
+    logger.warning("⚠️ WARNING: GEMINI_API_KEY not set in environment. /api/documents/generate will be unavailable.")
+
 @app.post("/api/documents/generate")
 async def generate_document(
     request: DocumentGenerationRequest,
@@ -2171,21 +2468,17 @@ async def generate_document(
             }]
         }
         
-        # Use environment variable for API key (secure)
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        # API key comes from the environment (secure), read once at startup
+        if not GEMINI_GENERATE_URL:
             raise HTTPException(status_code=500, detail="AI service not configured")
         
-        api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-        
-        import httpx
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                api_url, 
-                headers={'Content-Type': 'application/json'}, 
-                json=payload,
-                timeout=30.0
-            )
+        # Shared pooled client (see http_client above), so the TLS session is reused
+        response = await http_client.post(
+            GEMINI_GENERATE_URL, 
+            headers=GEMINI_HEADERS, 
+            json=payload,
+            timeout=30.0
+        )
         
         if not response.is_success:
             raise HTTPException(status_code=500, detail="AI generation failed")
@@ -2201,7 +2494,7 @@ async def generate_document(
         }
         
     except Exception as e:
-        print(f"Document generation error: {e}")
+        logger.exception(f"Document generation error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate document: {str(e)}")
 
 @app.post("/api/google/create-formatted-doc")
@@ -2221,7 +2514,6 @@ async def create_formatted_google_doc_from_markdown(
         
         # Convert markdown to Google Docs formatting requests
         if request.preserve_markdown:
-            markdown_converter = MarkdownToGoogleDocsConverter()
             formatting_requests = markdown_converter.convert_markdown_to_google_docs_requests(
                 request.content
             )
@@ -2252,7 +2544,7 @@ async def create_formatted_google_doc_from_markdown(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error creating formatted Google Doc: {e}")
+        logger.exception(f"Error creating formatted Google Doc: {e}")
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to create Google Doc: {str(e)}"
@@ -2262,8 +2554,15 @@ async def create_formatted_google_doc_from_markdown(
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        # Auto-reload is for development only; set API_RELOAD=True locally
+        reload=os.getenv("API_RELOAD", "False").lower() == "true",
+        # One process per core by default, each with its own event loop and GIL.
+        # Caches are per worker and short-lived, so workers agree within seconds.
+        # (Ignored when reload is on.)
+        workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        loop="uvloop",  # libuv event loop
+        http="httptools",  # C HTTP parser
         log_level="info"
     )
\ No newline at end of file
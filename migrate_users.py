@@ -2,24 +2,66 @@
 """
 User Migration Script for Firebase Indexing System
 Place this file in the root directory (same level as main.py)
-Run with: python migrate_users.py
+Run with: python migrate_users.py [-v]
 """
 
 import asyncio
+import logging
+import math
 import os
 import sys
 from datetime import datetime, timezone
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter, defaultdict, deque
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
+from google.api_core import retry_async
+from google.cloud.firestore import AsyncClient
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Add the current directory to Python path so we can import our services
 sys.path.append(str(Path(__file__).parent))
 
+# Users migrated at the same time; each one holds a few Firestore queries open
+MIGRATION_CONCURRENCY = int(os.getenv("MIGRATION_CONCURRENCY", "40"))
+
+# Users whose conversations, documents and tasks are fetched together with one
+# `in` query per collection (Firestore allows at most 30 values in an `in` filter)
+USER_BATCH_SIZE = 30
+BATCHES_IN_FLIGHT = max(1, math.ceil(MIGRATION_CONCURRENCY / USER_BATCH_SIZE))
+
+# Collections indexed by id on the user document
+INDEXED_COLLECTIONS = ("conversations", "documents", "tasks")
+
+# Projection for queries that only need document ids (an empty select returns every field)
+ID_ONLY = ["__name__"]
+
+# Collections the migration reads, every per-user query filtering on user_id
+MIGRATION_COLLECTIONS = ("users", "conversations", "documents", "tasks", "chat_history")
+
+# Async clients the reads are spread over; each has its own gRPC channel, so
+# concurrent streams aren't all multiplexed onto one connection
+FIRESTORE_CLIENTS = max(1, int(os.getenv("MIGRATION_FIRESTORE_CLIENTS", "4")))
+
+# Reads back off and retry on transient errors (UNAVAILABLE, DEADLINE_EXCEEDED, ...)
+# instead of failing the user on the first one; writes are retried by the BulkWriter
+FIRESTORE_RETRY = retry_async.AsyncRetry(
+    predicate=retry_async.if_transient_error,
+    initial=0.5,
+    multiplier=2,
+    maximum=30,
+    timeout=120
+)
+
 class MigrationScript:
     def __init__(self):
         self.db = None
+        self.collections = {}
+        self.client_collections = []
+        self.bulk_writer = None
+        self.failed_writes = []
         self.initialized = False
     
     def initialize_firebase(self):
@@ -59,7 +101,22 @@ class MigrationScript:
                     print("❌ No credentials directory found")
                     sys.exit(1)
             
-            self.db = firestore.client()
+            # Async client: queries and writes are awaited instead of blocking the event loop
+            self.db = firestore_async.client()
+            app = firebase_admin.get_app()
+            clients = [self.db] + [
+                AsyncClient(credentials=app.credential.get_credential(), project=app.project_id)
+                for _ in range(FIRESTORE_CLIENTS - 1)
+            ]
+            # Collection references are built once per client and reused by every query
+            self.client_collections = [
+                {name: client.collection(name) for name in MIGRATION_COLLECTIONS} for client in clients
+            ]
+            self.collections = self.client_collections[0]
+            # User updates are queued here and sent in batches, paced by Firestore's
+            # 500/50/5 ramp-up, instead of one set() round trip per user
+            self.bulk_writer = self.db.bulk_writer()
+            self.bulk_writer.on_write_error(self._on_write_error)
             self.initialized = True
             print("✅ Firebase initialized successfully!")
             
@@ -70,119 +127,194 @@ class MigrationScript:
             print("   2. Firebase credentials file in the credentials/ directory")
             sys.exit(1)
     
+    def _on_write_error(self, error, bulk_writer) -> bool:
+        """Retry a failed user write a few times, then record it for the summary"""
+        if error.attempts < 5:
+            return True
+        self.failed_writes.append((error.operation.reference.id, error.message))
+        return False
+    
+    def _collection(self, name: str, route: Optional[str] = None):
+        """Collection reference, reusing the one built at startup when there is one
+        
+        Queries for the same `route` (a user id) always go through the same client.
+        """
+        collections = self.collections
+        if route is not None:
+            collections = self.client_collections[hash(route) % len(self.client_collections)]
+        collection_ref = collections.get(name)
+        return collection_ref if collection_ref is not None else self.db.collection(name)
+    
     def get_user_document_ref(self, uid: str):
         """Get reference to user document"""
-        return self.db.document(f"users/{uid}")
+        return self.collections["users"].document(uid)
     
-    async def query_documents(self, collection: str, filters: List = None, limit: int = None):
-        """Query documents from Firestore"""
-        try:
-            collection_ref = self.db.collection(collection)
-            query = collection_ref
-            
-            # Apply filters
-            if filters:
-                for field, operator, value in filters:
-                    query = query.where(filter=firestore.FieldFilter(field, operator, value))
-            
-            # Apply limit
-            if limit:
-                query = query.limit(limit)
+    async def query_documents(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        select: List[str] = None,
+        order_by: str = None,
+        route: Optional[str] = None
+    ):
+        """Query documents from Firestore
+        
+        `select` limits the fields sent back; the id is always included.
+        `order_by` is a field name, prefixed with "-" for descending order.
+        Errors propagate so callers can tell a failed read from an empty result.
+        `route` picks the client the query is sent through (see _collection).
+        """
+        collection_ref = self._collection(collection, route)
+        query = collection_ref
+        
+        # Apply filters
+        if filters:
+            for field, operator, value in filters:
+                query = query.where(filter=firestore.FieldFilter(field, operator, value))
+        
+        # Apply projection
+        if select is not None:
+            query = query.select(select)
+        
+        # Apply ordering
+        if order_by:
+            if order_by.startswith("-"):
+                query = query.order_by(order_by[1:], direction=firestore.Query.DESCENDING)
+            else:
+                query = query.order_by(order_by)
+        
+        # Apply limit
+        if limit:
+            query = query.limit(limit)
+        
+        # Execute query
+        results = []
+        async for doc in query.stream(retry=FIRESTORE_RETRY):
+            data = doc.to_dict()
+            data['id'] = doc.id
+            results.append(data)
+        
+        return results
+    
+    async def iter_documents(self, collection: str, page_size: int = 500):
+        """Yield every document in a collection, reading it one page at a time"""
+        query = self._collection(collection).order_by("__name__").limit(page_size)
+        last_doc = None
+        
+        while True:
+            page = query.start_after(last_doc) if last_doc else query
+            docs = [doc async for doc in page.stream(retry=FIRESTORE_RETRY)]
             
-            # Execute query
-            docs = query.stream()
-            results = []
             for doc in docs:
                 data = doc.to_dict()
                 data['id'] = doc.id
-                results.append(data)
+                yield data
             
-            return results
-            
-        except Exception as e:
-            print(f"❌ Error querying {collection}: {e}")
-            return []
+            if len(docs) < page_size:
+                return
+            last_doc = docs[-1]
+    
+    async def warmup(self):
+        """Read one user id per client so every gRPC channel is open before the migration starts"""
+        async def read_one(users_ref):
+            async for _ in users_ref.select(ID_ONLY).limit(1).stream():
+                pass
+        
+        results = await asyncio.gather(
+            *(read_one(collections["users"]) for collections in self.client_collections),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("⚠️ Firestore warmup failed: %s", result)
+    
+    async def count_documents(self, collection: str, filters: List, route: Optional[str] = None) -> int:
+        """Count matching documents with a server-side aggregation (no documents are read)"""
+        query = self._collection(collection, route)
+        for field, operator, value in filters:
+            query = query.where(filter=firestore.FieldFilter(field, operator, value))
+        
+        result = await query.count().get(retry=FIRESTORE_RETRY)
+        return int(result[0][0].value)
+    
+    @staticmethod
+    def is_migrated(user_data: Dict[str, Any]) -> bool:
+        """True when the user document already has complete indexes"""
+        existing_indexes = user_data.get("indexes", {})
+        return (existing_indexes.get("conversation_ids") is not None and 
+                existing_indexes.get("document_ids") is not None)
     
-    async def migrate_single_user(self, user_id: str) -> Dict[str, Any]:
-        """Migrate a single user's data to indexed structure"""
+    async def migrate_single_user(
+        self,
+        user_id: str,
+        user_data: Optional[Dict[str, Any]] = None,
+        prefetched: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ) -> Dict[str, Any]:
+        """Migrate a single user's data to indexed structure
+        
+        Pass the user document's data when it has already been read to skip reading
+        it again, and `prefetched` (collection -> this user's documents) when the
+        conversations, documents and tasks were fetched for a batch of users.
+        """
         try:
-            print(f"\n🔄 Migrating user: {user_id}")
+            logger.info("🔄 Migrating user: %s", user_id)
             
             # Step 1: Check if user already has complete indexes
             user_ref = self.get_user_document_ref(user_id)
-            user_doc = user_ref.get()
+            if user_data is None:
+                user_doc = await user_ref.get(retry=FIRESTORE_RETRY)
+                user_data = user_doc.to_dict() if user_doc.exists else None
             
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                existing_indexes = user_data.get("indexes", {})
-                
-                # Check if migration is complete
-                if (existing_indexes.get("conversation_ids") is not None and 
-                    existing_indexes.get("document_ids") is not None):
-                    print(f"✅ User {user_id} already migrated, skipping...")
-                    return {"status": "skipped", "reason": "already_migrated"}
+            # Check if migration is complete
+            if user_data is not None and self.is_migrated(user_data):
+                logger.info("✅ User %s already migrated, skipping...", user_id)
+                return {"status": "skipped", "reason": "already_migrated"}
             
             # Step 2: Gather all user data
-            print(f"   📊 Gathering data for user {user_id}...")
-            
-            # Get conversations
-            conversations = await self.query_documents(
-                "conversations",
-                filters=[("user_id", "==", user_id)]
-            )
             
-            # Get documents
-            documents = await self.query_documents(
-                "documents", 
-                filters=[("user_id", "==", user_id)]
+            # One timestamp for the whole migration of this user
+            now = datetime.now(timezone.utc)
+            user_filter = [("user_id", "==", user_id)]
+            
+            async def indexed_items(collection: str) -> List[Dict[str, Any]]:
+                if prefetched is not None:
+                    return prefetched.get(collection, [])
+                return await self.query_documents(collection, filters=user_filter, select=ID_ONLY, route=user_id)
+            
+            # Conversations, documents and tasks for the indexes, plus message statistics
+            # counted by Firestore rather than by reading every message; all at once
+            conversations, documents, tasks, total_messages, last_messages = await asyncio.gather(
+                *(indexed_items(collection) for collection in INDEXED_COLLECTIONS),
+                self.count_documents("chat_history", user_filter, route=user_id),
+                self.query_documents(
+                    "chat_history", filters=user_filter, select=["timestamp"], order_by="-timestamp", limit=1,
+                    route=user_id
+                ),
+                return_exceptions=True
             )
             
-            # Get tasks (if collection exists)
-            tasks = []
-            try:
-                tasks = await self.query_documents(
-                    "tasks",
-                    filters=[("user_id", "==", user_id)]
-                )
-            except:
-                pass  # Tasks collection might not exist
-            
-            # Get messages for statistics
-            messages = await self.query_documents(
-                "chat_history",
-                filters=[("user_id", "==", user_id)]
-            )
+            if isinstance(tasks, Exception):
+                tasks = []  # Tasks collection might not exist
+            for result in (conversations, documents, total_messages, last_messages):
+                if isinstance(result, Exception):
+                    raise result
             
-            print(f"   📈 Found: {len(conversations)} conversations, {len(documents)} documents, {len(tasks)} tasks, {len(messages)} messages")
+            logger.debug("   📈 Found: %d conversations, %d documents, %d tasks, %d messages",
+                         len(conversations), len(documents), len(tasks), total_messages)
             
             # Step 3: Build indexes
             conversation_ids = [conv["id"] for conv in conversations]
             document_ids = [doc["id"] for doc in documents]
             task_ids = [task["id"] for task in tasks]
             
-            # Step 4: Calculate statistics
-            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-            today_messages = []
-            last_message_at = None
-            
-            for msg in messages:
-                msg_timestamp = msg.get("timestamp")
-                if msg_timestamp:
-                    if isinstance(msg_timestamp, str):
-                        try:
-                            msg_timestamp = datetime.fromisoformat(msg_timestamp.replace('Z', '+00:00'))
-                        except:
-                            continue
-                    
-                    # Ensure both datetimes are timezone-aware for comparison
-                    if msg_timestamp.tzinfo is None:
-                        msg_timestamp = msg_timestamp.replace(tzinfo=timezone.utc)
-                    
-                    if msg_timestamp >= today_start:
-                        today_messages.append(msg)
-                    
-                    if not last_message_at or msg_timestamp > last_message_at:
-                        last_message_at = msg_timestamp
+            # Step 4: Latest message time (older messages may store it as an ISO string)
+            last_message_at = last_messages[0].get("timestamp") if last_messages else None
+            if isinstance(last_message_at, str):
+                try:
+                    last_message_at = datetime.fromisoformat(last_message_at.replace('Z', '+00:00'))
+                except ValueError:
+                    last_message_at = None
             
             # Step 5: Build the complete user data structure
             migration_data = {
@@ -196,33 +328,33 @@ class MigrationScript:
                 "stats": {
                     "total_conversations": len(conversations),
                     "total_documents": len(documents),
-                    "total_messages": len(messages),
+                    "total_messages": total_messages,
                     "total_tasks": len(tasks),
                     "total_notes": 0,
-                    "messages_today": len(today_messages),
-                    "last_activity": datetime.now(timezone.utc),
+                    # messages_today is left to the app, which starts it on the day's
+                    # first save; chat_history holds extra per-exchange copies
+                    "last_activity": now,
                     "last_message_at": last_message_at
                 },
                 "migration_info": {
-                    "migrated_at": datetime.now(timezone.utc),
+                    "migrated_at": now,
                     "migration_version": "1.0",
                     "migration_script": "migrate_users.py",
                     "data_found": {
                         "conversations": len(conversations),
                         "documents": len(documents),
                         "tasks": len(tasks),
-                        "messages": len(messages)
+                        "messages": total_messages
                     }
                 },
-                "updated_at": datetime.now(timezone.utc)
+                "updated_at": now
             }
             
-            # Step 6: Update the user document (merge to preserve existing data)
-            user_ref.set(migration_data, merge=True)
+            # Step 6: Queue the user document update (merge to preserve existing data)
+            self.bulk_writer.set(user_ref, migration_data, merge=True)
             
-            print(f"✅ Successfully migrated user {user_id}")
-            print(f"   📁 Indexed: {len(conversation_ids)} conversations, {len(document_ids)} documents")
-            print(f"   📊 Stats: {len(messages)} total messages, {len(today_messages)} today")
+            logger.info("✅ Migrated user %s (write queued): %d conversations, %d documents, %d messages",
+                        user_id, len(conversation_ids), len(document_ids), total_messages)
             
             return {
                 "status": "success",
@@ -230,81 +362,159 @@ class MigrationScript:
                     "conversations": len(conversation_ids),
                     "documents": len(document_ids),
                     "tasks": len(task_ids),
-                    "messages": len(messages)
+                    "messages": total_messages
                 }
             }
             
         except Exception as e:
-            print(f"❌ Failed to migrate user {user_id}: {e}")
+            logger.warning("❌ Failed to migrate user %s: %s", user_id, e)
             return {"status": "failed", "error": str(e)}
     
+    async def query_documents_for_users(self, collection: str, user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """One `in` query for several users' documents (ids only), grouped by user_id"""
+        docs = await self.query_documents(
+            collection, filters=[("user_id", "in", user_ids)], select=["user_id"], route=user_ids[0]
+        )
+        
+        docs_by_user = defaultdict(list)
+        for doc in docs:
+            docs_by_user[doc.get("user_id")].append(doc)
+        return docs_by_user
+    
+    async def migrate_user_batch(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Migrate up to USER_BATCH_SIZE users, given as (position, user_id, user_data)"""
+        user_ids = [user_id for _, user_id, _ in batch]
+        conversations, documents, tasks = await asyncio.gather(
+            *(self.query_documents_for_users(collection, user_ids) for collection in INDEXED_COLLECTIONS),
+            return_exceptions=True
+        )
+        
+        if isinstance(tasks, Exception):
+            tasks = {}  # Tasks collection might not exist
+        for result in (conversations, documents):
+            if isinstance(result, Exception):
+                return [(user_id, {"status": "failed", "error": str(result)}) for user_id in user_ids]
+        
+        async def migrate_user(i: int, user_id: str, user_data: Dict[str, Any]):
+            logger.debug("[%d] Processing user: %s", i, user_id)
+            prefetched = {
+                "conversations": conversations.get(user_id, []),
+                "documents": documents.get(user_id, []),
+                "tasks": tasks.get(user_id, []),
+            }
+            try:
+                return user_id, await self.migrate_single_user(user_id, user_data, prefetched)
+            except Exception as e:
+                return user_id, {"status": "failed", "error": str(e)}
+        
+        return await asyncio.gather(*(migrate_user(*user) for user in batch))
+    
     async def migrate_all_users(self):
         """Migrate all users to indexed structure"""
         try:
             print("🚀 Starting migration of all users to indexed structure...")
             
-            # Get all users
-            all_users = await self.query_documents("users")
-            print(f"👥 Found {len(all_users)} users to process")
-            
-            if len(all_users) == 0:
-                print("❌ No users found! Make sure your Firebase connection is correct.")
-                return
-            
-            # Migration counters
-            migrated_count = 0
-            failed_count = 0
-            skipped_count = 0
-            migration_results = []
-            
-            # Process each user
-            for i, user_doc in enumerate(all_users, 1):
+            # Migration counters; only a few sample results and the failures are kept
+            counts = Counter()
+            sample_results = deque(maxlen=5)
+            failed_migrations = []
+            
+            def record(user_id: str, result: Dict[str, Any]):
+                counts[result["status"]] += 1
+                entry = {"user_id": user_id, **result}
+                sample_results.append(entry)
+                if result["status"] == "failed":
+                    failed_migrations.append(entry)
+            
+            # Users are read a page at a time and migrated as they arrive, in batches
+            # of USER_BATCH_SIZE with at most BATCHES_IN_FLIGHT batches at once, so
+            # memory doesn't grow with the user count
+            total_users = 0
+            in_flight = set()
+            batch = []
+            
+            async def submit(batch: List[Tuple[int, str, Dict[str, Any]]]):
+                nonlocal in_flight
+                if len(in_flight) >= BATCHES_IN_FLIGHT:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        for user_id, result in task.result():
+                            record(user_id, result)
+                in_flight.add(asyncio.create_task(self.migrate_user_batch(batch)))
+            
+            async for user_doc in self.iter_documents("users"):
+                total_users += 1
                 user_id = user_doc.get("uid") or user_doc.get("id")
                 
                 if not user_id:
-                    print(f"⚠️ Skipping user {i} - no UID found")
-                    skipped_count += 1
+                    logger.warning("⚠️ Skipping user %d - no UID found", total_users)
+                    counts["skipped"] += 1
                     continue
                 
-                print(f"\n[{i}/{len(all_users)}] Processing user: {user_id}")
-                
-                # Migrate this user
-                result = await self.migrate_single_user(user_id)
-                migration_results.append({"user_id": user_id, **result})
-                
-                if result["status"] == "success":
-                    migrated_count += 1
-                elif result["status"] == "skipped":
-                    skipped_count += 1
-                else:
-                    failed_count += 1
+                # Already-migrated users don't need their collections fetched
+                if self.is_migrated(user_doc):
+                    logger.info("✅ User %s already migrated, skipping...", user_id)
+                    record(user_id, {"status": "skipped", "reason": "already_migrated"})
+                    continue
                 
-                # Small delay to be nice to Firebase
-                await asyncio.sleep(0.1)
+                batch.append((total_users, user_id, user_doc))
+                if len(batch) == USER_BATCH_SIZE:
+                    await submit(batch)
+                    batch = []
+            
+            if batch:
+                await submit(batch)
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight)
+                for task in done:
+                    for user_id, result in task.result():
+                        record(user_id, result)
+            
+            print(f"👥 Processed {total_users} users")
+            if total_users == 0:
+                print("❌ No users found! Make sure your Firebase connection is correct.")
+                return
+            
+            # Send whatever is still queued; flush() blocks, so run it in a thread
+            await asyncio.to_thread(self.bulk_writer.flush)
+            
+            # Users whose queued write failed were counted as migrated; move them over
+            write_errors = dict(self.failed_writes)
+            for user_id, error in write_errors.items():
+                counts["success"] -= 1
+                counts["failed"] += 1
+                failed_migrations.append({"user_id": user_id, "status": "failed", "error": f"Write failed: {error}"})
+            for entry in sample_results:
+                if entry["user_id"] in write_errors:
+                    entry["status"] = "failed"
+            
+            migrated_count = counts["success"]
+            skipped_count = counts["skipped"]
+            failed_count = counts["failed"]
             
             # Print final summary
             print(f"\n🏁 Migration Complete!")
             print(f"{'='*50}")
             print(f"📊 SUMMARY:")
-            print(f"   Total Users:     {len(all_users)}")
+            print(f"   Total Users:     {total_users}")
             print(f"   ✅ Migrated:     {migrated_count}")
             print(f"   ⏭️  Skipped:      {skipped_count}")
             print(f"   ❌ Failed:       {failed_count}")
-            print(f"   📈 Success Rate: {((migrated_count + skipped_count) / len(all_users) * 100):.1f}%")
+            print(f"   📈 Success Rate: {((migrated_count + skipped_count) / total_users * 100):.1f}%")
             
             # Show some sample results
-            if migration_results:
+            if sample_results:
                 print(f"\n📝 Sample Results:")
-                for result in migration_results[:5]:  # First 5
+                for result in sample_results:
                     status_emoji = {"success": "✅", "skipped": "⏭️", "failed": "❌"}
                     emoji = status_emoji.get(result["status"], "❓")
                     print(f"   {emoji} {result['user_id']}: {result['status']}")
                 
-                if len(migration_results) > 5:
-                    print(f"   ... and {len(migration_results) - 5} more")
+                remaining = sum(counts.values()) - len(sample_results)
+                if remaining > 0:
+                    print(f"   ... and {remaining} more")
             
             # Show failed migrations if any
-            failed_migrations = [r for r in migration_results if r["status"] == "failed"]
             if failed_migrations:
                 print(f"\n❌ Failed Migrations:")
                 for failure in failed_migrations:
@@ -321,14 +531,15 @@ class MigrationScript:
         try:
             print(f"\n🔍 Verifying migration results...")
             
-            all_users = await self.query_documents("users")
+            total_users = 0
             migrated_users = 0
             users_with_data = 0
             total_conversations = 0
             total_documents = 0
             total_messages = 0
             
-            for user_doc in all_users:
+            async for user_doc in self.iter_documents("users"):
+                total_users += 1
                 user_id = user_doc.get("uid") or user_doc.get("id")
                 if not user_id:
                     continue
@@ -352,10 +563,10 @@ class MigrationScript:
                     total_messages += msg_count
             
             print(f"✅ VERIFICATION RESULTS:")
-            print(f"   Total Users:           {len(all_users)}")
+            print(f"   Total Users:           {total_users}")
             print(f"   Migrated Users:        {migrated_users}")
             print(f"   Users with Data:       {users_with_data}")
-            print(f"   Migration Rate:        {(migrated_users / len(all_users) * 100):.1f}%")
+            print(f"   Migration Rate:        {(migrated_users / total_users * 100):.1f}%")
             print(f"   Total Conversations:   {total_conversations}")
             print(f"   Total Documents:       {total_documents}")
             print(f"   Total Messages:        {total_messages}")
@@ -381,11 +592,16 @@ async def main():
         print(f"\n⚠️  This script will migrate ALL users to the indexed structure.")
         print(f"   It's safe to run multiple times (skips already migrated users).")
         
-        response = input(f"\n❓ Continue with migration? (y/N): ").lower().strip()
+        # Open the Firestore connection while waiting for the answer; input() runs
+        # in a thread so it doesn't block the event loop
+        warmup = asyncio.create_task(migration.warmup())
+        response = (await asyncio.to_thread(input, f"\n❓ Continue with migration? (y/N): ")).lower().strip()
         
         if response not in ['y', 'yes']:
+            warmup.cancel()
             print("❌ Migration cancelled by user.")
             return
+        await warmup
         
         # Run the migration
         await migration.migrate_all_users()
@@ -403,5 +619,11 @@ async def main():
         raise
 
 if __name__ == "__main__":
+    # Per-user progress is logged at INFO; pass -v to see it
+    logging.basicConfig(
+        level=logging.INFO if "-v" in sys.argv[1:] else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    
     # Run the async main function
     asyncio.run(main())
\ No newline at end of file
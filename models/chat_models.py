@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
@@ -67,8 +67,8 @@ class MessageHistory(BaseModel):
     processing_time: Optional[float] = None
     tokens_used: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    # Read-only once loaded; nested into AIContext/ConversationSummary as-is, not revalidated
+    model_config = ConfigDict(from_attributes=True, frozen=True, revalidate_instances="never")
 
 class ConversationSummary(BaseModel):
     """Model for conversation summary"""
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -57,8 +57,8 @@ class DocumentResponse(DocumentBase):
     version: int = 1
     word_count: int = 0
     
-    class Config:
-        from_attributes = True
+    # Read-only once built, so cached instances can be shared safely
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class DocumentSummary(BaseModel):
     """Model for document summary (list view)"""
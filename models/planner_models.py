@@ -1,5 +1,5 @@
 # models/planner_models.py - Enhanced version
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 from enum import Enum
@@ -45,11 +45,15 @@ class TaskCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = {}
     sync_to_calendar: Optional[bool] = False
 
-    @validator('title')
+    @field_validator('title')
+    @classmethod
     def title_must_not_be_empty(cls, v):
-        if not v or not v.strip():
+        if not v or v.isspace():
             raise ValueError('Title cannot be empty')
-        return v.strip()
+        # Only build a stripped copy when there is whitespace to strip
+        if v[0].isspace() or v[-1].isspace():
+            return v.strip()
+        return v
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
@@ -75,8 +79,7 @@ class TaskResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Note Models
 class NoteCreate(BaseModel):
@@ -86,11 +89,15 @@ class NoteCreate(BaseModel):
     tags: Optional[List[str]] = []
     metadata: Optional[Dict[str, Any]] = {}
 
-    @validator('title')
+    @field_validator('title')
+    @classmethod
     def title_must_not_be_empty(cls, v):
-        if not v or not v.strip():
+        if not v or v.isspace():
             raise ValueError('Title cannot be empty')
-        return v.strip()
+        # Only build a stripped copy when there is whitespace to strip
+        if v[0].isspace() or v[-1].isspace():
+            return v.strip()
+        return v
 
 class NoteUpdate(BaseModel):
     title: Optional[str] = None
@@ -111,8 +118,7 @@ class NoteResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # Calendar Models
 class CalendarEventCreate(BaseModel):
@@ -138,8 +144,7 @@ class CalendarEvent(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Recording Models
 class RecordingCreate(BaseModel):
@@ -170,8 +175,7 @@ class MeetingRecording(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Dashboard and Stats Models
 class PlannerStats(BaseModel):
@@ -1,5 +1,5 @@
 # models/user_models.py - COMPLETE REWRITE
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -49,8 +49,7 @@ class UserResponse(BaseModel):
     last_login: Optional[datetime] = None
     preferences: Optional[Dict[str, Any]] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class UserLogin(BaseModel):
     """Model for user login"""
@@ -82,6 +81,8 @@ class ProfileStats(BaseModel):
     last_activity: Optional[datetime] = None
     streak_days: int = 0
     total_login_days: int = 0
+    
+    model_config = ConfigDict(frozen=True)
 
 class NotificationPreference(str, Enum):
     """Notification preference levels"""
@@ -105,7 +106,8 @@ class NotificationSettings(BaseModel):
     weekend_notifications: bool = False
     updated_at: Optional[datetime] = None
 
-    @validator('quiet_hours_start', 'quiet_hours_end')
+    @field_validator('quiet_hours_start', 'quiet_hours_end')
+    @classmethod
     def validate_time_format(cls, v):
         if v is not None:
             try:
@@ -0,0 +1,30 @@
+# pagination.py - opaque cursors for Firestore-paged list endpoints
+from typing import Any, Dict
+from datetime import datetime
+from fastapi import HTTPException
+import base64
+import json
+
+# Lists are ordered by one field and then by document id, so a cursor is just
+# that pair for the last item of a page. It is sent back in X-Next-Cursor.
+
+def encode_cursor(document: Dict[str, Any], order_field: str = "updated_at") -> str:
+    """Opaque cursor pointing just past a document in a listing ordered by order_field"""
+    value = document[order_field]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, document["id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises HTTPException 400 on garbage
+
+    The ordering value comes back as a datetime: every listed collection is
+    ordered by a Firestore timestamp, and Firestore sorts all strings after
+    all timestamps, so a string cursor would skip every remaining document.
+    """
+    try:
+        value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(value), str(doc_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
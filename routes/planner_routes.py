@@ -1,6 +1,9 @@
 # routes/planner_routes.py
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional, List
 from models.planner_models import (
     TaskCreate, TaskResponse, TaskUpdate, TaskStatus, TaskPriority,
@@ -11,11 +14,32 @@ from models.planner_models import (
 from services.enhanced_planner_service import EnhancedPlannerService
 from services.firebase_service import FirebaseService
 from services.google_service import GoogleService
-from auth import get_current_user
+from auth import get_current_uid
+from conditional_get import conditional_json_response
+from pagination import encode_cursor, decode_cursor
 
 
 router = APIRouter(prefix="/planner", tags=["planner"])
 
+# Built once at import; list endpoints dump through these and return the
+# response directly, so FastAPI does not re-validate every element
+TASK_LIST_ADAPTER = TypeAdapter(List[TaskResponse])
+NOTE_LIST_ADAPTER = TypeAdapter(List[NoteResponse])
+
+# The today/upcoming filters only change with the date, so each is built once
+# per day and shared; nothing downstream mutates a TaskFilter it is given
+@lru_cache(maxsize=32)
+def _today_filter(day: date) -> TaskFilter:
+    return TaskFilter(due_date_from=day, due_date_to=day)
+
+@lru_cache(maxsize=32)
+def _upcoming_filter(day: date, days: int) -> TaskFilter:
+    return TaskFilter(
+        due_date_from=day,
+        due_date_to=day + timedelta(days=days),
+        status=[TaskStatus.TODO, TaskStatus.IN_PROGRESS]
+    )
+
 # Initialize services (you'll inject these from main.py)
 def get_services():
     from main import enhanced_planner_service  # ✅ Use the initialized one
@@ -28,19 +52,19 @@ def get_services():
 @router.post("/tasks", response_model=TaskResponse)
 async def create_task(
     task: TaskCreate, 
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Create a new task with optional calendar sync"""
     try:
-        return await service.create_task(task, user["uid"])
+        return await service.create_task(task, uid)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/tasks/quick", response_model=TaskResponse)
 async def create_quick_task(
     quick_task: QuickTaskCreate,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Create a quick task (simplified creation)"""
@@ -57,12 +81,13 @@ async def create_quick_task(
             sync_to_calendar=quick_task.due_today
         )
         
-        return await service.create_task(task, user["uid"])
+        return await service.create_task(task, uid)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tasks", response_model=List[TaskResponse])
 async def get_tasks(
+    request: Request,
     # Individual filter parameters
     status: Optional[str] = Query(None, description="Comma-separated status values"),
     priority: Optional[str] = Query(None, description="Comma-separated priority values"),
@@ -71,10 +96,16 @@ async def get_tasks(
     completed: Optional[bool] = Query(None, description="Filter by completion status"),
     limit: Optional[int] = Query(default=50, le=100, description="Maximum number of tasks to return"),
     search: Optional[str] = Query(None, description="Search in task titles and descriptions"),
-    user=Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
-    """Get user tasks with filtering options"""
+    """Get user tasks with filtering options
+    
+    Paged oldest first; when more tasks may follow, X-Next-Cursor holds the
+    cursor for the next page.
+    """
+    start_after = decode_cursor(cursor) if cursor else None
     try:
         # Build TaskFilter from query parameters
         task_filter = TaskFilter()
@@ -108,12 +139,15 @@ async def get_tasks(
         print(f"Getting tasks with filter: {task_filter}")  # Debug log
         
         # Call service method with proper parameters
-        return await service.get_tasks(
-            user["uid"], 
+        tasks, last_read = await service.get_tasks_page(
+            uid, 
             task_filter=task_filter,
             completed=completed,
-            limit=limit
+            limit=limit,
+            start_after=start_after
         )
+        headers = {"X-Next-Cursor": encode_cursor(last_read, "created_at")} if last_read else None
+        return conditional_json_response(request, tasks, headers, adapter=TASK_LIST_ADAPTER)
         
     except HTTPException:
         raise
@@ -124,21 +158,18 @@ async def get_tasks(
 
 @router.get("/tasks/today", response_model=List[TaskResponse])
 async def get_today_tasks(
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Get today's tasks"""
     try:
-        today = date.today()
-        task_filter = TaskFilter(
-            due_date_from=today,
-            due_date_to=today
-        )
+        task_filter = _today_filter(date.today())
         
-        return await service.get_tasks(
-            user["uid"],
+        tasks = await service.get_tasks(
+            uid,
             task_filter=task_filter
         )
+        return ORJSONResponse(content=TASK_LIST_ADAPTER.dump_python(tasks, mode="json"))
     except Exception as e:
         print(f"Error getting today's tasks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -146,24 +177,18 @@ async def get_today_tasks(
 @router.get("/tasks/upcoming", response_model=List[TaskResponse])
 async def get_upcoming_tasks(
     days: int = Query(default=7, ge=1, le=30),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Get upcoming tasks for the next N days"""
     try:
-        today = date.today()
-        end_date = today + timedelta(days=days)
-        
-        task_filter = TaskFilter(
-            due_date_from=today,
-            due_date_to=end_date,
-            status=[TaskStatus.TODO, TaskStatus.IN_PROGRESS]
-        )
+        task_filter = _upcoming_filter(date.today(), days)
         
-        return await service.get_tasks(
-            user["uid"],
+        tasks = await service.get_tasks(
+            uid,
             task_filter=task_filter
         )
+        return ORJSONResponse(content=TASK_LIST_ADAPTER.dump_python(tasks, mode="json"))
     except Exception as e:
         print(f"Error getting upcoming tasks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -172,12 +197,12 @@ async def get_upcoming_tasks(
 async def update_task(
     task_id: str,
     task_update: TaskUpdate,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Update an existing task"""
     try:
-        return await service.update_task(task_id, task_update, user["uid"])
+        return await service.update_task(task_id, task_update, uid)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -186,13 +211,13 @@ async def update_task(
 @router.post("/tasks/{task_id}/toggle")
 async def toggle_task_completion(
     task_id: str,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Toggle task completion status"""
     try:
         # Get current task first
-        current_task = await service.get_task(task_id, user["uid"])
+        current_task = await service.get_task(task_id, uid)
         
         # Toggle status
         new_status = (TaskStatus.COMPLETED 
@@ -200,7 +225,7 @@ async def toggle_task_completion(
                      else TaskStatus.TODO)
         
         task_update = TaskUpdate(status=new_status)
-        return await service.update_task(task_id, task_update, user["uid"])
+        return await service.update_task(task_id, task_update, uid)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -209,12 +234,12 @@ async def toggle_task_completion(
 @router.delete("/tasks/{task_id}")
 async def delete_task(
     task_id: str,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Delete a task and its associated calendar event"""
     try:
-        success = await service.delete_task(task_id, user["uid"])
+        success = await service.delete_task(task_id, uid)
         return {"success": success, "message": "Task deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -229,12 +254,12 @@ async def delete_task(
 async def get_calendar_events(
     start_date: date = Query(..., description="Start date for events (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date for events (YYYY-MM-DD)"),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Get calendar events for date range - IMPROVED VERSION"""
     try:
-        print(f"🔄 Getting calendar events for user {user['uid']} from {start_date} to {end_date}")
+        print(f"🔄 Getting calendar events for user {uid} from {start_date} to {end_date}")
         
         # Validate date range
         if start_date > end_date:
@@ -246,15 +271,15 @@ async def get_calendar_events(
         
         # Check if user has Google credentials first
         if hasattr(service, 'google_service'):
-            has_credentials = await service.google_service._check_google_credentials(user["uid"])
+            has_credentials = await service.google_service._check_google_credentials(uid)
             
             if not has_credentials:
-                print(f"⚠️ User {user['uid']} has no valid Google credentials, returning empty list")
+                print(f"⚠️ User {uid} has no valid Google credentials, returning empty list")
                 return []
             
             # Get calendar events from Google
             events = await service.google_service.get_calendar_events(
-                user["uid"], 
+                uid, 
                 start_date_str, 
                 end_date_str
             )
@@ -274,7 +299,7 @@ async def get_calendar_events(
                         attendees=event.get('attendees', []),
                         created_at=datetime.utcnow().isoformat(),
                         updated_at=datetime.utcnow().isoformat(),
-                        user_id=user["uid"],
+                        user_id=uid,
                         google_event_id=event.get('google_event_id')
                     )
                     calendar_events.append(calendar_event)
@@ -299,13 +324,13 @@ async def get_calendar_events(
 @router.post("/calendar/events")
 async def create_calendar_event(
     event_data: CalendarEventCreate,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Create a new calendar event"""
     try:
         result = await service.google_service.create_calendar_event(
-            user["uid"], event_data.dict()
+            uid, event_data.dict()
         )
         return result
     except Exception as e:
@@ -314,7 +339,7 @@ async def create_calendar_event(
 @router.post("/calendar/sync")
 async def sync_calendar_tasks(
     days_ahead: int = Query(default=30, ge=1, le=90),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Sync tasks with Google Calendar"""
@@ -323,7 +348,7 @@ async def sync_calendar_tasks(
         end_date = start_date + timedelta(days=days_ahead)
         
         result = await service.sync_calendar_tasks(
-            user["uid"], start_date, end_date
+            uid, start_date, end_date
         )
         return result
     except Exception as e:
@@ -336,24 +361,29 @@ async def sync_calendar_tasks(
 @router.post("/notes", response_model=NoteResponse)
 async def create_note(
     note: NoteCreate,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Create a new note"""
     try:
-        return await service.create_note(note, user["uid"])
+        return await service.create_note(note, uid)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/notes", response_model=List[NoteResponse])
 async def get_notes(
+    request: Request,
     limit: Optional[int] = Query(default=20, le=50),
-    user=Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
-    """Get user notes"""
+    """Get user notes, oldest first, paged via X-Next-Cursor"""
+    start_after = decode_cursor(cursor) if cursor else None
     try:
-        return await service.get_notes(user["uid"], limit=limit)
+        notes, last_read = await service.get_notes_page(uid, limit=limit, start_after=start_after)
+        headers = {"X-Next-Cursor": encode_cursor(last_read, "created_at")} if last_read else None
+        return conditional_json_response(request, notes, headers, adapter=NOTE_LIST_ADAPTER)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -361,12 +391,12 @@ async def get_notes(
 async def update_note(
     note_id: str,
     note_update: NoteUpdate,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Update an existing note"""
     try:
-        return await service.update_note(note_id, note_update, user["uid"])
+        return await service.update_note(note_id, note_update, uid)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -375,12 +405,12 @@ async def update_note(
 @router.delete("/notes/{note_id}")
 async def delete_note(
     note_id: str,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Delete a note"""
     try:
-        success = await service.delete_note(note_id, user["uid"])
+        success = await service.delete_note(note_id, uid)
         return {"success": success, "message": "Note deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -390,14 +420,14 @@ async def delete_note(
 @router.post("/notes/{note_id}/export-google")
 async def export_note_to_google_keep(
     note_id: str,
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Export note to Google Keep"""
     try:
-        note = await service.get_note(note_id, user["uid"])
+        note = await service.get_note(note_id, uid)
         result = await service.google_service.create_keep_note(
-            user["uid"], note.title, note.content
+            uid, note.title, note.content
         )
         return result
     except ValueError as e:
@@ -411,13 +441,13 @@ async def export_note_to_google_keep(
 
 @router.get("/dashboard", response_model=PlannerDashboard)
 async def get_planner_dashboard(
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Get comprehensive planner dashboard"""
     try:
-        print(f"Getting dashboard for user: {user['uid']}")  # Debug log
-        dashboard = await service.get_planner_dashboard(user["uid"])
+        print(f"Getting dashboard for user: {uid}")  # Debug log
+        dashboard = await service.get_planner_dashboard(uid)
         print(f"Dashboard retrieved successfully")  # Debug log
         return dashboard
     except Exception as e:
@@ -443,19 +473,19 @@ async def get_planner_dashboard(
 @router.get("/stats")
 async def get_planner_stats(
     days: int = Query(default=30, ge=1, le=365),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Get planner statistics for specified period"""
     try:
-        return await service.get_planner_stats(user["uid"], days=days)
+        return await service.get_planner_stats(uid, days=days)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/tasks/sync-calendar")
 async def sync_tasks_with_calendar(
     days_ahead: int = Query(default=7, ge=1, le=90),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Sync tasks with calendar - alternative endpoint for mobile app compatibility"""
@@ -464,7 +494,7 @@ async def sync_tasks_with_calendar(
         end_date = start_date + timedelta(days=days_ahead)
         
         result = await service.sync_calendar_tasks(
-            user["uid"], start_date, end_date
+            uid, start_date, end_date
         )
         return result
     except Exception as e:
@@ -473,18 +503,18 @@ async def sync_tasks_with_calendar(
 @router.post("/calendar/sync-google")
 async def sync_google_calendar(
     days_ahead: int = Query(default=7, ge=1, le=90),
-    user=Depends(get_current_user),
+    uid: str = Depends(get_current_uid),
     service: EnhancedPlannerService = Depends(get_services)
 ):
     """Manually sync with Google Calendar"""
     try:
-        print(f"🔄 Manual Google Calendar sync requested for user {user['uid']}")
+        print(f"🔄 Manual Google Calendar sync requested for user {uid}")
         
         if not hasattr(service, 'google_service'):
             raise HTTPException(status_code=503, detail="Google service not available")
         
         # Check credentials
-        has_credentials = await service.google_service._check_google_credentials(user["uid"])
+        has_credentials = await service.google_service._check_google_credentials(uid)
         if not has_credentials:
             raise HTTPException(
                 status_code=401, 
@@ -496,7 +526,7 @@ async def sync_google_calendar(
         end_date = start_date + timedelta(days=days_ahead)
         
         events = await service.google_service.get_calendar_events(
-            user["uid"], 
+            uid, 
             start_date.isoformat(), 
             end_date.isoformat()
         )
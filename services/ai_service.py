@@ -2,6 +2,7 @@
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import asyncio
 import os
 import time
 import json
@@ -355,6 +356,7 @@ Example format:
             }
             
             await self.firebase_service.create_document("chat_history", ai_msg_data)
+            self.firebase_service.invalidate_messages_today(user_id)
             
             # Update conversation metadata
             await self._update_conversation_metadata(user_id, conversation_id, ai_response)
@@ -388,10 +390,14 @@ Example format:
             
             if conversations:
                 conv_id = conversations[0]["id"]
+                now = self._get_utc_now()  # Use timezone-aware datetime
                 update_data = {
-                    "updated_at": self._get_utc_now(),  # Use timezone-aware datetime
+                    "updated_at": now,
                     "title": title,
-                    "message_count": conversations[0].get("message_count", 0) + 2  # +2 for user and AI message
+                    "message_count": conversations[0].get("message_count", 0) + 2,  # +2 for user and AI message
+                    # Denormalized preview so list views don't query chat_history per conversation
+                    "last_message": last_message[:100] + "..." if len(last_message) > 100 else last_message,
+                    "last_message_at": now
                 }
                 await self.firebase_service.update_document("conversations", conv_id, update_data)
         
@@ -639,59 +645,33 @@ Example format:
             
             print(f"Getting chat stats for user: {user_id}")
             
-            # Count total conversations from top-level conversations collection
-            conversations = await self.firebase_service.query_documents(
-                "conversations",
-                filters=[("user_id", "==", user_id)]
-            )
-            total_conversations = len(conversations)
-            print(f"Found {total_conversations} conversations")
-            
-            # Count total messages from top-level chat_history collection
-            messages = await self.firebase_service.query_documents(
-                "chat_history",
-                filters=[("user_id", "==", user_id)]
-            )
-            total_messages = len(messages)
-            print(f"Found {total_messages} total messages")
-            
-            # Count messages today - FIXED: Use timezone-aware datetime comparison
+            # Counts come from Firestore count() aggregations, so no message
+            # documents are transferred; only the latest message is read
+            user_filter = [("user_id", "==", user_id)]
             today_start = self._get_today_start_utc()
             print(f"Today start (UTC): {today_start}")
             
-            messages_today = 0
-            for message in messages:
-                try:
-                    msg_timestamp = message.get("timestamp")
-                    if msg_timestamp:
-                        # Normalize the message timestamp
-                        normalized_timestamp = self._normalize_datetime(msg_timestamp)
-                        
-                        # Now we can safely compare timezone-aware datetimes
-                        if normalized_timestamp >= today_start:
-                            messages_today += 1
-                except Exception as e:
-                    print(f"Error processing message timestamp: {e}")
-                    continue
-            
-            print(f"Found {messages_today} messages today")
+            total_conversations, total_messages, messages_today, latest_messages = await asyncio.gather(
+                self.firebase_service.count_documents("conversations", filters=user_filter),
+                self.firebase_service.count_documents("chat_history", filters=user_filter),
+                self.firebase_service.count_documents(
+                    "chat_history",
+                    filters=user_filter + [("timestamp", ">=", today_start)]
+                ),
+                self.firebase_service.query_documents(
+                    "chat_history",
+                    filters=user_filter,
+                    order_by="-timestamp",
+                    limit=1
+                )
+            )
+            print(f"Found {total_conversations} conversations, {total_messages} total messages, {messages_today} today")
             
             # Calculate last chat time
             last_chat_at = None
-            if messages:
-                try:
-                    # Get the most recent message
-                    latest_messages = await self.firebase_service.query_documents(
-                        "chat_history",
-                        filters=[("user_id", "==", user_id)],
-                        order_by="-timestamp",
-                        limit=1
-                    )
-                    if latest_messages:
-                        last_timestamp = latest_messages[0].get("timestamp")
-                        last_chat_at = self._normalize_datetime(last_timestamp)
-                except Exception as e:
-                    print(f"Error getting last chat time: {e}")
+            if latest_messages:
+                last_timestamp = latest_messages[0].get("timestamp")
+                last_chat_at = self._normalize_datetime(last_timestamp) if last_timestamp else None
             
             result = {
                 "total_conversations": total_conversations,
@@ -807,46 +787,49 @@ Example format:
         self, 
         user_id: str, 
         limit: int = 50, 
-        offset: int = 0
+        start_after: Optional[Tuple[Any, str]] = None
     ) -> List[Dict[str, Any]]:
-        """Get user conversations using index - much faster!"""
+        """Get a page of user conversations, most recent first
+        
+        Paged with a Firestore cursor, so a page costs `limit` reads however many
+        conversations the user has. Pass start_after=(updated_at, id) of the last
+        conversation already seen to get the next page. Needs the composite
+        index (user_id ASC, updated_at DESC, __name__ DESC) on conversations.
+        """
         try:
-            # Get conversations using the user's index
-            conversations = await self.firebase_service.get_user_items_by_index(
-                uid=user_id,
-                collection="conversations",
-                index_type="conversation_ids",
+            conversations = await self.firebase_service.query_documents(
+                "conversations",
+                filters=[("user_id", "==", user_id)],
+                order_by=[("updated_at", "desc"), ("__name__", "desc")],
                 limit=limit,
-                offset=offset
+                start_after=list(start_after) if start_after else None
             )
             
-            # Sort by updated_at (most recent first)
-            conversations.sort(key=lambda x: x.get("updated_at", datetime.min), reverse=True)
-            
-            # Add recent message preview for each conversation
-            for conv in conversations:
-                try:
-                    # Get recent messages for this specific conversation
-                    recent_messages = await self.firebase_service.query_documents(
-                        "chat_history",
-                        filters=[
-                            ("user_id", "==", user_id),
-                            ("conversation_id", "==", conv.get("conversation_id"))
-                        ],
-                        order_by="-timestamp",
-                        limit=1
-                    )
-                    
-                    if recent_messages:
-                        last_msg = recent_messages[0]["content"]
-                        conv["last_message"] = last_msg[:100] + "..." if len(last_msg) > 100 else last_msg
-                        conv["last_message_at"] = recent_messages[0]["timestamp"]
-                    else:
-                        conv["last_message"] = "Start chatting..."
-                        conv["last_message_at"] = conv.get("created_at", datetime.utcnow())
-                        
-                except Exception as e:
-                    print(f"Error getting recent message: {e}")
+            # Last message preview is stored on the conversation when messages are saved;
+            # only conversations written before that need a chat_history lookup
+            legacy_conversations = [conv for conv in conversations if "last_message" not in conv]
+            last_messages = await asyncio.gather(*[
+                self.firebase_service.query_documents(
+                    "chat_history",
+                    filters=[
+                        ("user_id", "==", user_id),
+                        ("conversation_id", "==", conv.get("conversation_id"))
+                    ],
+                    order_by="-timestamp",
+                    limit=1
+                )
+                for conv in legacy_conversations
+            ], return_exceptions=True)
+            
+            for conv, recent_messages in zip(legacy_conversations, last_messages):
+                if isinstance(recent_messages, Exception):
+                    print(f"Error getting recent message: {recent_messages}")
+                    recent_messages = []
+                if recent_messages:
+                    last_msg = recent_messages[0]["content"]
+                    conv["last_message"] = last_msg[:100] + "..." if len(last_msg) > 100 else last_msg
+                    conv["last_message_at"] = recent_messages[0]["timestamp"]
+                else:
                     conv["last_message"] = "Start chatting..."
                     conv["last_message_at"] = conv.get("created_at", datetime.utcnow())
             
@@ -876,25 +859,10 @@ Example format:
             stats = user_profile["stats"]
             
             # Calculate messages today (this is the only dynamic calculation needed)
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
             messages_today = 0
             
-            # You could also cache this in a separate field updated by a background job
             try:
-                today_messages = await self.firebase_service.query_documents(
-                    "chat_history",
-                    filters=[
-                        ("user_id", "==", user_id),
-                        ("timestamp", ">=", today_start)
-                    ]
-                )
-                messages_today = len(today_messages)
-                
-                # Update the cached value
-                await self.firebase_service.update_user_stats(user_id, {
-                    "messages_today": messages_today,
-                    "last_activity": datetime.utcnow()
-                })
+                messages_today = await self.firebase_service.count_messages_today(user_id)
                 
             except Exception as e:
                 print(f"Could not calculate today's messages: {e}")
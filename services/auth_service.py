@@ -94,7 +94,7 @@ class AuthService:
             
             await self.firebase_service.create_user_profile(user_record.uid, profile_data)
             
-            return UserResponse(**profile_data)
+            return UserResponse.model_validate(profile_data)
             
         except auth.EmailAlreadyExistsError:
             raise ValueError("User with this email already exists")
@@ -221,7 +221,7 @@ class AuthService:
             
             print(f"👤 Creating UserResponse object...")
             # Create UserResponse object
-            user_response = UserResponse(**user_profile)
+            user_response = UserResponse.model_validate(user_profile)
             
             print(f"🎟️ Creating AuthToken response...")
             # Return AuthToken with all required fields
@@ -289,7 +289,7 @@ class AuthService:
     async def get_current_user(self, token: str) -> UserResponse:
         """Get current user from token"""
         user_data = await self.verify_token(token)
-        return UserResponse(**user_data)
+        return UserResponse.model_validate(user_data)
 
     async def update_user_profile(self, uid: str, update_data: Dict[str, Any]) -> UserResponse:
         """Update user profile"""
@@ -312,7 +312,7 @@ class AuthService:
             
             # Get updated profile
             updated_profile = await self.firebase_service.get_user_profile(uid)
-            return UserResponse(**updated_profile)
+            return UserResponse.model_validate(updated_profile)
             
         except Exception as e:
             raise Exception(f"Failed to update user profile: {e}")
@@ -418,7 +418,7 @@ class AuthService:
             for user in page.users:
                 user_profile = await self.firebase_service.get_user_profile(user.uid)
                 if user_profile:
-                    users.append(UserResponse(**user_profile))
+                    users.append(UserResponse.model_validate(user_profile))
             
             return {
                 "users": users,
@@ -434,7 +434,7 @@ class AuthService:
             user_profile = await self.firebase_service.get_user_profile(user_record.uid)
             
             if user_profile:
-                return UserResponse(**user_profile)
+                return UserResponse.model_validate(user_profile)
             return None
         except auth.UserNotFoundError:
             return None
@@ -1,10 +1,17 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
+from cachetools import TTLCache
+from google.api_core import exceptions as gexc
+import hashlib
+import json
 from models.document_models import DocumentCreate, DocumentResponse, DocumentUpdate, GoogleDocExport, DocumentType
 from services.firebase_service import FirebaseService
+from errors import NotFoundError
 import re
 import uuid
 
+DOCUMENT_CACHE_TTL_SECONDS = 30
+
 class DocumentService:
     """Service for document operations"""
     
@@ -12,6 +19,18 @@ class DocumentService:
         self.firebase_service = firebase_service
         self.google_service = google_service  # Will be injected
         self.collection_name = "documents"
+        # document_id -> (etag, DocumentResponse, JSON body); entries are dropped whenever we write the document.
+        # The TTL bounds staleness for writes made by other worker processes.
+        self._document_cache = TTLCache(maxsize=1024, ttl=DOCUMENT_CACHE_TTL_SECONDS)
+    
+    def _compute_etag(self, doc: Dict[str, Any]) -> str:
+        """Build a strong ETag from the document's contents"""
+        payload = json.dumps(doc, sort_keys=True, default=str).encode("utf-8")
+        return f'"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+    
+    def invalidate_document(self, document_id: str) -> None:
+        """Forget the cached copy of a document after it changes"""
+        self._document_cache.pop(document_id, None)
     
     async def create_document(self, document: DocumentCreate, user_id: str) -> DocumentResponse:
         """Create a new document"""
@@ -43,26 +62,48 @@ class DocumentService:
             # Get the created document
             created_doc = await self.firebase_service.get_document(self.collection_name, doc_id)
             
-            return DocumentResponse(**created_doc)
+            return DocumentResponse.model_validate(created_doc)
             
         except Exception as e:
             raise Exception(f"Failed to create document: {e}")
     
+    async def _get_cached_document(self, document_id: str, user_id: str) -> Tuple[str, DocumentResponse, bytes]:
+        """Load a document into the cache (validated and encoded once) and check ownership"""
+        cached = self._document_cache.get(document_id)
+        if cached is None:
+            doc = await self.firebase_service.get_document(self.collection_name, document_id)
+            if not doc:
+                raise NotFoundError("Document not found")
+            document = DocumentResponse.model_validate(doc)
+            cached = (self._compute_etag(doc), document, document.model_dump_json().encode("utf-8"))
+            self._document_cache[document_id] = cached
+        
+        # Verify ownership
+        if cached[1].user_id != user_id:
+            raise NotFoundError("Document not found")
+        
+        return cached
+    
+    async def get_document_with_etag(self, document_id: str, user_id: str) -> Tuple[DocumentResponse, str]:
+        """Get a specific document and its ETag, from the in-memory cache when possible"""
+        etag, document, _ = await self._get_cached_document(document_id, user_id)
+        # DocumentResponse is frozen, so the cached instance can be handed out as is
+        return document, etag
+    
+    async def get_document_json(self, document_id: str, user_id: str) -> Tuple[bytes, str]:
+        """Get a specific document as ready-to-send JSON bytes and its ETag"""
+        etag, _, body = await self._get_cached_document(document_id, user_id)
+        return body, etag
+    
     async def get_document(self, document_id: str, user_id: str) -> DocumentResponse:
         """Get a specific document"""
         try:
-            # Verify ownership
-            if not await self.firebase_service.verify_document_ownership(
-                self.collection_name, document_id, user_id
-            ):
-                raise ValueError("Document not found or access denied")
-            
-            doc = await self.firebase_service.get_document(self.collection_name, document_id)
-            if not doc:
-                raise ValueError("Document not found")
-            
-            return DocumentResponse(**doc)
+            document, _ = await self.get_document_with_etag(document_id, user_id)
+            return document
             
+        except (NotFoundError, gexc.GoogleAPICallError):
+            # Answered by the app's exception handlers (404, 403, 504...)
+            raise
         except Exception as e:
             raise Exception(f"Failed to get document: {e}")
     
@@ -81,7 +122,7 @@ class DocumentService:
                 limit=limit
             )
             
-            return [DocumentResponse(**doc) for doc in docs]
+            return [DocumentResponse.model_validate(doc) for doc in docs]
             
         except Exception as e:
             raise Exception(f"Failed to get user documents: {e}")
@@ -98,7 +139,7 @@ class DocumentService:
             if not await self.firebase_service.verify_document_ownership(
                 self.collection_name, document_id, user_id
             ):
-                raise ValueError("Document not found or access denied")
+                raise NotFoundError("Document not found")
             
             # Prepare update data
             update_data = {}
@@ -127,18 +168,25 @@ class DocumentService:
             current_doc = await self.firebase_service.get_document(self.collection_name, document_id)
             update_data["version"] = current_doc.get("version", 1) + 1
             
-            # Update document
-            await self.firebase_service.update_document(
-                self.collection_name, 
-                document_id, 
-                update_data
+            # Update document and the summary used by the list view
+            await self.firebase_service.update_document_with_index(
+                self.collection_name,
+                document_id,
+                user_id,
+                "document_ids",
+                update_data,
+                current_doc
             )
+            self.invalidate_document(document_id)
             
             # Get updated document
             updated_doc = await self.firebase_service.get_document(self.collection_name, document_id)
             
-            return DocumentResponse(**updated_doc)
+            # Trusted data read back from Firestore, no need to re-validate
+            return DocumentResponse.model_construct(**updated_doc)
             
+        except (NotFoundError, gexc.GoogleAPICallError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to update document: {e}")
     
@@ -149,13 +197,16 @@ class DocumentService:
             if not await self.firebase_service.verify_document_ownership(
                 self.collection_name, document_id, user_id
             ):
-                raise ValueError("Document not found or access denied")
+                raise NotFoundError("Document not found")
             
             # Delete document
             await self.firebase_service.delete_document(self.collection_name, document_id)
+            self.invalidate_document(document_id)
             
             return True
             
+        except (NotFoundError, gexc.GoogleAPICallError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to delete document: {e}")
     
@@ -189,7 +240,7 @@ class DocumentService:
                 tag_match = any(search_term in tag.lower() for tag in doc.get("tags", []))
                 
                 if title_match or content_match or tag_match:
-                    results.append(DocumentResponse(**doc))
+                    results.append(DocumentResponse.model_validate(doc))
                 
                 if len(results) >= limit:
                     break
@@ -255,15 +306,19 @@ class DocumentService:
                 google_doc_url = f"https://docs.google.com/document/d/{google_doc_id}/edit"
             
             # Update document with Google Docs info
-            await self.firebase_service.update_document(
+            await self.firebase_service.update_document_with_index(
                 self.collection_name,
                 document_id,
+                user_id,
+                "document_ids",
                 {
                     "google_doc_id": google_doc_id,
                     "google_doc_url": google_doc_url,
                     "exported_to_google_at": datetime.utcnow()
-                }
+                },
+                doc
             )
+            self.invalidate_document(document_id)
             
             return GoogleDocExport(
                 google_doc_id=google_doc_id,
@@ -441,20 +496,23 @@ class DocumentService:
                 
                 if doc_id and update_data:
                     # Verify ownership
-                    if await self.firebase_service.verify_document_ownership(
-                        self.collection_name, doc_id, user_id
-                    ):
-                        await self.firebase_service.update_document(
+                    current_doc = await self.firebase_service.get_document(self.collection_name, doc_id)
+                    if current_doc and current_doc.get("user_id") == user_id:
+                        await self.firebase_service.update_document_with_index(
                             self.collection_name,
                             doc_id,
-                            update_data
+                            user_id,
+                            "document_ids",
+                            update_data,
+                            current_doc
                         )
+                        self.invalidate_document(doc_id)
                         
                         updated_doc = await self.firebase_service.get_document(
                             self.collection_name, 
                             doc_id
                         )
-                        updated_docs.append(DocumentResponse(**updated_doc))
+                        updated_docs.append(DocumentResponse.model_validate(updated_doc))
             
             return updated_docs
             
@@ -472,6 +530,7 @@ class DocumentService:
                         self.collection_name, doc_id, user_id
                     ):
                         await self.firebase_service.delete_document(self.collection_name, doc_id)
+                        self.invalidate_document(doc_id)
                         deleted_count += 1
                 except Exception:
                     # Continue with other documents if one fails
@@ -483,7 +542,20 @@ class DocumentService:
             raise Exception(f"Failed to delete multiple documents: {e}")
 
 class MarkdownToGoogleDocsConverter:
-    """Converts markdown content to Google Docs API formatting requests"""
+    """Converts markdown content to Google Docs API formatting requests
+    
+    Holds no per-call state, so one instance can be shared across requests.
+    """
+    
+    # Compiled once with the class rather than looked up on every line
+    NUMBERED_LIST_PATTERN = re.compile(r'^\d+\. ')
+    HEADING_MARKER_PATTERN = re.compile(r'^#{1,6}\s+')
+    BULLET_MARKER_PATTERN = re.compile(r'^[\-\*]\s+')
+    NUMBER_MARKER_PATTERN = re.compile(r'^\d+\.\s+')
+    BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+    ITALIC_STAR_PATTERN = re.compile(r'\*(.*?)\*')
+    ITALIC_UNDERSCORE_PATTERN = re.compile(r'_(.*?)_')
+    INLINE_ITALIC_PATTERN = re.compile(r'(?<!\*)\*([^*]+)\*(?!\*)')
     
     def convert_markdown_to_google_docs_requests(self, markdown_content: str) -> List[Dict]:
         """Convert markdown to Google Docs formatting requests"""
@@ -542,7 +614,7 @@ class MarkdownToGoogleDocsConverter:
         elif line.startswith('- ') or line.startswith('* '):
             # Bullet list
             requests.extend(self._format_bullet_list(start_index, len(clean_text) - 1))
-        elif re.match(r'^\d+\. ', line):
+        elif self.NUMBERED_LIST_PATTERN.match(line):
             # Numbered list
             requests.extend(self._format_numbered_list(start_index, len(clean_text) - 1))
         
@@ -555,16 +627,16 @@ class MarkdownToGoogleDocsConverter:
     def _clean_markdown_syntax(self, text: str) -> str:
         """Remove markdown syntax characters but preserve the text"""
         # Remove heading markers
-        text = re.sub(r'^#{1,6}\s+', '', text)
+        text = self.HEADING_MARKER_PATTERN.sub('', text)
         
         # Remove list markers
-        text = re.sub(r'^[\-\*]\s+', '• ', text)
-        text = re.sub(r'^\d+\.\s+', '', text)
+        text = self.BULLET_MARKER_PATTERN.sub('• ', text)
+        text = self.NUMBER_MARKER_PATTERN.sub('', text)
         
         # Remove bold and italic markers (but keep the text)
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-        text = re.sub(r'\*(.*?)\*', r'\1', text)
-        text = re.sub(r'_(.*?)_', r'\1', text)
+        text = self.BOLD_PATTERN.sub(r'\1', text)
+        text = self.ITALIC_STAR_PATTERN.sub(r'\1', text)
+        text = self.ITALIC_UNDERSCORE_PATTERN.sub(r'\1', text)
         
         return text
     
@@ -668,10 +740,8 @@ class MarkdownToGoogleDocsConverter:
         requests = []
         
         # Find bold text **text**
-        bold_pattern = r'\*\*(.*?)\*\*'
-        for match in re.finditer(bold_pattern, line):
+        for match in self.BOLD_PATTERN.finditer(line):
             # Calculate position in cleaned text
-            clean_line = self._clean_markdown_syntax(line)
             text_before_match = self._clean_markdown_syntax(line[:match.start()])
             match_text = match.group(1)
             
@@ -690,8 +760,7 @@ class MarkdownToGoogleDocsConverter:
             })
         
         # Find italic text *text* (but not **text**)
-        italic_pattern = r'(?<!\*)\*([^*]+)\*(?!\*)'
-        for match in re.finditer(italic_pattern, line):
+        for match in self.INLINE_ITALIC_PATTERN.finditer(line):
             text_before_match = self._clean_markdown_syntax(line[:match.start()])
             match_text = match.group(1)
             
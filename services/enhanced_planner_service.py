@@ -59,7 +59,7 @@ class EnhancedPlannerService:
                 except Exception as e:
                     print(f"⚠️ Failed to create calendar event for task {task_id}: {e}")
             
-            return TaskResponse(**task_data)
+            return TaskResponse.model_validate(task_data)
             
         except Exception as e:
             raise Exception(f"Failed to create task: {e}")
@@ -76,7 +76,7 @@ class EnhancedPlannerService:
             if task_doc.get("user_id") != user_id:
                 raise ValueError(f"Task {task_id} not found")
             
-            return TaskResponse(**task_doc)
+            return TaskResponse.model_validate(task_doc)
             
         except ValueError:
             raise
@@ -91,6 +91,23 @@ class EnhancedPlannerService:
         limit: int = 50
     ) -> List[TaskResponse]:
         """Get user tasks with filtering"""
+        tasks, _ = await self.get_tasks_page(user_id, task_filter, completed, limit)
+        return tasks
+    
+    async def get_tasks_page(
+        self, 
+        user_id: str, 
+        task_filter: Optional[TaskFilter] = None,
+        completed: Optional[bool] = None,
+        limit: int = 50,
+        start_after: Optional[Tuple[datetime, str]] = None
+    ) -> Tuple[List[TaskResponse], Optional[Dict[str, Any]]]:
+        """Get one page of user tasks, oldest first, with filtering
+        
+        Returns the tasks and the last stored task read when the page was full
+        (the cursor for the next page), else None. Due-date and search filters
+        apply after the read, so a page can be short and still have a next page.
+        """
         try:
             # Build query constraints
             constraints = [("user_id", "==", user_id)]
@@ -114,10 +131,15 @@ class EnhancedPlannerService:
             
             # Get tasks from Firebase
             tasks_data = await self.firebase_service.query_documents(
-                "tasks", constraints, limit=limit, order_by="created_at"
+                "tasks",
+                constraints,
+                limit=limit,
+                order_by=[("created_at", "asc"), ("__name__", "asc")],
+                start_after=list(start_after) if start_after else None
             )
+            last_read = tasks_data[-1] if len(tasks_data) == limit else None
             
-            tasks = [TaskResponse(**task) for task in tasks_data]
+            tasks = [TaskResponse.model_validate(task) for task in tasks_data]
             
             # Apply additional filters that can't be done in Firebase query
             if task_filter:
@@ -151,7 +173,7 @@ class EnhancedPlannerService:
                            (task.description and search_term in task.description.lower())
                     ]
             
-            return tasks
+            return tasks, last_read
             
         except Exception as e:
             raise Exception(f"Failed to get tasks: {e}")
@@ -479,20 +501,35 @@ class EnhancedPlannerService:
             note_id = await self.firebase_service.create_document("notes", note_data)
             note_data["id"] = note_id
             
-            return NoteResponse(**note_data)
+            return NoteResponse.model_validate(note_data)
             
         except Exception as e:
             raise Exception(f"Failed to create note: {e}")
     
     async def get_notes(self, user_id: str, limit: int = 20) -> List[NoteResponse]:
         """Get user notes"""
+        notes, _ = await self.get_notes_page(user_id, limit)
+        return notes
+    
+    async def get_notes_page(
+        self, 
+        user_id: str, 
+        limit: int = 20,
+        start_after: Optional[Tuple[datetime, str]] = None
+    ) -> Tuple[List[NoteResponse], Optional[Dict[str, Any]]]:
+        """Get one page of user notes, oldest first, and the last note when more may follow"""
         try:
             constraints = [("user_id", "==", user_id)]
             notes_data = await self.firebase_service.query_documents(
-                "notes", constraints, limit=limit, order_by="created_at"
+                "notes",
+                constraints,
+                limit=limit,
+                order_by=[("created_at", "asc"), ("__name__", "asc")],
+                start_after=list(start_after) if start_after else None
             )
             
-            return [NoteResponse(**note) for note in notes_data]
+            last_read = notes_data[-1] if len(notes_data) == limit else None
+            return [NoteResponse.model_validate(note) for note in notes_data], last_read
             
         except Exception as e:
             raise Exception(f"Failed to get notes: {e}")
@@ -1,14 +1,39 @@
 # services/firebase_service.py - COMPLETE FIXED VERSION
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import os
 import uuid
+import heapq
+import asyncio
+from itertools import islice
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Firestore caps the number of values in an "in" filter
+FIRESTORE_IN_QUERY_LIMIT = 30
+
+# How long a user's ID indexes are served from memory before re-reading Firestore
+USER_INDEX_CACHE_TTL_SECONDS = 60
+# Profiles handed to get_current_user; profile writes below drop the entry
+USER_PROFILE_CACHE_TTL_SECONDS = 30
+# Today's message count per user; message saves drop the entry
+MESSAGES_TODAY_CACHE_TTL_SECONDS = 60
+# users/{uid}.schema_version: 2 once the user's data lives in the indexed structure
+USER_SCHEMA_VERSION = 2
+LEGACY_USER_SCHEMA_VERSION = 1
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+# Newest-first ids kept next to the full index for the dashboard
+RECENT_INDEX_SIZE = 5
+# Fields copied onto users/{uid}.document_summaries so the list view is one read
+DOCUMENT_SUMMARY_FIELDS = ["title", "document_type", "status", "tags", "word_count", "created_at", "updated_at"]
+# Dashboard metrics stored on stats whenever the counters are rewritten
+DERIVED_STAT_KEYS = ("avg_messages_per_conversation", "estimated_hours_saved", "productivity_score")
+
 class FirebaseService:
     """Firebase service for authentication and database operations with local file references"""
     
@@ -16,6 +41,15 @@ class FirebaseService:
         self._initialized = False
         self.db = None
         self.server_base_url = os.getenv("SERVER_BASE_URL", "http://localhost:8000")
+        self._index_cache = TTLCache(maxsize=10000, ttl=USER_INDEX_CACHE_TTL_SECONDS)
+        self._profile_cache = TTLCache(maxsize=10000, ttl=USER_PROFILE_CACHE_TTL_SECONDS)
+        # uid -> profile read in progress, so concurrent cache misses share one read
+        self._profile_reads_in_flight: Dict[str, asyncio.Future] = {}
+        # uid -> [profile reads running, invalidations since the first of them started],
+        # so a read that overlapped an invalidation doesn't cache its result. Only
+        # users with a read in progress have an entry.
+        self._profile_reads_running: Dict[str, List[int]] = {}
+        self._messages_today_cache = TTLCache(maxsize=10000, ttl=MESSAGES_TODAY_CACHE_TTL_SECONDS)
     
     def initialize(self):
         """Initialize Firebase Admin SDK"""
@@ -85,9 +119,11 @@ class FirebaseService:
                 raise RuntimeError("Firebase service not initialized")
             user_ref = self.get_user_document_ref(uid)
             user_data['uid'] = uid
+            user_data['schema_version'] = USER_SCHEMA_VERSION  # new users start on the indexed structure
             user_data['created_at'] = datetime.utcnow()
             user_data['updated_at'] = datetime.utcnow()
             user_ref.set(user_data)
+            self.invalidate_user_profile(uid)
             print(f"✅ Created user profile for {uid}")
             return True
             
@@ -95,26 +131,78 @@ class FirebaseService:
             print(f"❌ Failed to create user profile: {e}")
             return False
     
-    async def get_user_profile(self, uid: str) -> Optional[Dict[str, Any]]:
-        """Get user profile data"""
+    def invalidate_user_profile(self, uid: str) -> None:
+        """Drop the cached copy of a user's profile after it changes"""
+        running = self._profile_reads_running.get(uid)
+        if running is not None:
+            running[1] += 1
+        self._profile_cache.pop(uid, None)
+        self._profile_reads_in_flight.pop(uid, None)
+    
+    async def _read_user_profile(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Read the user document (in a thread) and refresh the profile cache
+        
+        The result is only cached when no invalidation happened during the read;
+        otherwise it may predate the write and would be served for the whole TTL.
+        """
+        running = self._profile_reads_running.setdefault(uid, [0, 0])
+        running[0] += 1
+        generation = running[1]
+        try:
+            user_ref = self.get_user_document_ref(uid)
+            doc = await asyncio.to_thread(user_ref.get)
+        finally:
+            running[0] -= 1
+            if running[0] == 0:
+                del self._profile_reads_running[uid]
+        
+        if not doc.exists:
+            print(f"⚠️ User profile not found for {uid}")
+            return None
+        
+        user_data = doc.to_dict()
+        
+        # Handle avatar URL building from filename
+        if 'avatar_filename' in user_data and user_data['avatar_filename']:
+            user_data['avatar_url'] = self.build_avatar_url(user_data['avatar_filename'])
+        
+        if running[1] == generation:
+            self._profile_cache[uid] = user_data
+        print(f"✅ Retrieved user profile for {uid}")
+        return user_data
+    
+    async def get_user_profile(self, uid: str, use_cache: bool = False) -> Optional[Dict[str, Any]]:
+        """Get user profile data (use_cache allows a copy up to a few seconds old)
+        
+        With use_cache, concurrent misses for the same user (a client opening
+        the app fires several requests with one token) wait on a single read.
+        """
         try:
             if not self._initialized or not self.db:
                 raise RuntimeError("Firebase service not initialized")
-            user_ref = self.get_user_document_ref(uid)
-            doc = user_ref.get()
             
-            if doc.exists:
-                user_data = doc.to_dict()
+            if use_cache:
+                cached = self._profile_cache.get(uid)
+                if cached is not None:
+                    return dict(cached)
                 
-                # Handle avatar URL building from filename
-                if 'avatar_filename' in user_data and user_data['avatar_filename']:
-                    user_data['avatar_url'] = self.build_avatar_url(user_data['avatar_filename'])
-                
-                print(f"✅ Retrieved user profile for {uid}")
-                return user_data
+                pending = self._profile_reads_in_flight.get(uid)
+                if pending is None:
+                    pending = asyncio.ensure_future(self._read_user_profile(uid))
+                    self._profile_reads_in_flight[uid] = pending
+                    
+                    def _forget(done: asyncio.Future) -> None:
+                        # Only if an invalidation hasn't already replaced it
+                        if self._profile_reads_in_flight.get(uid) is done:
+                            del self._profile_reads_in_flight[uid]
+                    
+                    pending.add_done_callback(_forget)
+                # shield: one caller giving up must not cancel the read for the others
+                user_data = await asyncio.shield(pending)
             else:
-                print(f"⚠️ User profile not found for {uid}")
-                return None
+                user_data = await self._read_user_profile(uid)
+            
+            return dict(user_data) if user_data is not None else None
                 
         except Exception as e:
             print(f"❌ Failed to get user profile: {e}")
@@ -126,6 +214,7 @@ class FirebaseService:
             user_ref = self.get_user_document_ref(uid)
             update_data['updated_at'] = datetime.utcnow()
             user_ref.update(update_data)
+            self.invalidate_user_profile(uid)
             print(f"✅ Updated user profile for {uid}")
             return True
             
@@ -141,6 +230,7 @@ class FirebaseService:
                 'avatar_filename': avatar_filename,
                 'updated_at': datetime.utcnow()
             })
+            self.invalidate_user_profile(uid)
             print(f"✅ Updated avatar for user {uid}")
             return True
             
@@ -219,7 +309,8 @@ class FirebaseService:
             if not self._initialized or not self.db:
                 raise RuntimeError("Firebase service not initialized")
             doc_ref = self.db.collection(collection).document(doc_id)
-            doc = doc_ref.get()
+            # Run the blocking read in a thread so concurrent reads can overlap
+            doc = await asyncio.to_thread(doc_ref.get)
             
             if doc.exists:
                 data = doc.to_dict()
@@ -232,6 +323,30 @@ class FirebaseService:
             print(f"❌ Failed to get document: {e}")
             return None
     
+    async def get_many(self, collection: str, doc_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get several documents by ID in one batched read, preserving the order of doc_ids
+        
+        If fields is given only those fields are fetched (plus the id).
+        """
+        if not self._initialized or not self.db:
+            raise RuntimeError("Firebase service not initialized")
+        if not doc_ids:
+            return []
+        
+        collection_ref = self.db.collection(collection)
+        refs = [collection_ref.document(doc_id) for doc_id in doc_ids]
+        snapshots = await asyncio.to_thread(lambda: list(self.db.get_all(refs, field_paths=fields)))
+        
+        found = {}
+        for snapshot in snapshots:
+            if snapshot.exists:
+                data = snapshot.to_dict()
+                data['id'] = snapshot.id
+                found[snapshot.id] = data
+        
+        # get_all returns documents in arbitrary order
+        return [found[doc_id] for doc_id in doc_ids if doc_id in found]
+    
     async def update_document(self, collection: str, doc_id: str, update_data: Dict[str, Any]) -> bool:
         """Update a document"""
         try:
@@ -268,7 +383,8 @@ class FirebaseService:
     collection: str, 
     filters: List[tuple] = None, 
     order_by = None,  # Can be string or list
-    limit: int = None
+    limit: int = None,
+    start_after: Optional[List[Any]] = None  # cursor values, one per order_by field
 ) -> List[Dict[str, Any]]:
         """Query documents with optional filters - SUPPORTS BOTH STRING AND LIST ORDER_BY"""
         try:
@@ -297,12 +413,16 @@ class FirebaseService:
                     else:
                         query = query.order_by(order_by, direction=firestore.Query.ASCENDING)
             
+            # Resume after the last item of the previous page
+            if start_after:
+                query = query.start_after(start_after)
+            
             # Apply limit
             if limit:
                 query = query.limit(limit)
             
-            # Execute query
-            docs = query.stream()
+            # Execute query (in a thread so concurrent queries can overlap)
+            docs = await asyncio.to_thread(lambda: list(query.stream()))
             
             results = []
             for doc in docs:
@@ -318,6 +438,59 @@ class FirebaseService:
             traceback.print_exc()  # Better error debugging
             return []
     
+    async def count_documents(self, collection: str, filters: List[tuple] = None) -> int:
+        """Count matching documents with a server-side aggregation (no documents are downloaded)"""
+        try:
+            if not self._initialized or not self.db:
+                raise RuntimeError("Firebase service not initialized")
+            query = self.db.collection(collection)
+            
+            if filters:
+                for field, operator, value in filters:
+                    query = query.where(field, operator, value)
+            
+            results = await asyncio.to_thread(query.count(alias="count").get)
+            return int(results[0][0].value)
+            
+        except Exception as e:
+            print(f"❌ Failed to count documents: {e}")
+            raise e
+    
+    def invalidate_messages_today(self, uid: str) -> None:
+        """Drop the cached messages-today count after new messages are saved"""
+        self._messages_today_cache.pop(uid, None)
+    
+    async def count_messages_today(self, uid: str) -> int:
+        """The user's chat messages since midnight UTC
+        
+        Read from the stats.messages_today counter kept by
+        save_chat_messages_with_indexes; users saved before the counter had a
+        date fall back to a count query (cached briefly).
+        """
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        profile = await self.get_user_profile(uid, use_cache=True)
+        stats = (profile or {}).get("stats", {})
+        if "messages_today_date" in stats:
+            if stats["messages_today_date"] == today_start.date().isoformat():
+                return stats.get("messages_today", 0)
+            return 0
+        
+        # Stored with its day, so a cached count never leaks past midnight
+        cached = self._messages_today_cache.get(uid)
+        if cached is not None and cached[0] == today_start:
+            return cached[1]
+        
+        count = await self.count_documents(
+            "chat_history",
+            filters=[
+                ("user_id", "==", uid),
+                ("timestamp", ">=", today_start)
+            ]
+        )
+        self._messages_today_cache[uid] = (today_start, count)
+        return count
+    
     async def get_user_documents(
         self, 
         collection: str, 
@@ -423,10 +596,32 @@ class FirebaseService:
             "total_messages": 0,
             "total_notes": 0,
             "messages_today": 0,
+            "messages_today_date": None,
             "last_activity": None,
-            "last_message_at": None
+            "last_message_at": None,
+            "avg_messages_per_conversation": 0,
+            "estimated_hours_saved": 0.0,
+            "productivity_score": 0
         }
     
+    def compute_derived_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Dashboard metrics that depend only on the message/conversation counters"""
+        total_messages = stats.get("total_messages", 0)
+        total_conversations = stats.get("total_conversations", 0)
+        return {
+            "avg_messages_per_conversation": (
+                total_messages / total_conversations if total_conversations > 0 else 0
+            ),
+            "estimated_hours_saved": round(total_messages * 0.1, 1),  # 6 minutes per 10 messages
+            "productivity_score": min(100, total_messages)  # Simple score out of 100
+        }
+    
+    def get_derived_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Derived metrics as stored on stats, computed only for docs written before they were stored"""
+        if all(key in stats for key in DERIVED_STAT_KEYS):
+            return {key: stats[key] for key in DERIVED_STAT_KEYS}
+        return self.compute_derived_stats(stats)
+    
     async def initialize_user_indexes(self, uid: str) -> bool:
         """Initialize user document with empty indexes and stats"""
         try:
@@ -439,12 +634,14 @@ class FirebaseService:
                 # Create new user document with indexes
                 user_data = {
                     "uid": uid,
+                    "schema_version": USER_SCHEMA_VERSION,
                     "indexes": self._get_empty_indexes(),
                     "stats": self._get_empty_stats(),
                     "created_at": datetime.utcnow(),
                     "updated_at": datetime.utcnow()
                 }
                 user_ref.set(user_data)
+                self.invalidate_user_indexes(uid)
                 print(f"✅ Initialized user indexes for {uid}")
             else:
                 # Update existing user with indexes if they don't exist
@@ -466,6 +663,7 @@ class FirebaseService:
                         "stats": user_data["stats"],
                         "updated_at": user_data["updated_at"]
                     })
+                    self.invalidate_user_indexes(uid)
                     print(f"✅ Added indexes to existing user {uid}")
             
             return True
@@ -506,6 +704,7 @@ class FirebaseService:
                     f"stats.{stat_key}": stats[stat_key],
                     "updated_at": datetime.utcnow()
                 })
+                self.invalidate_user_indexes(uid)
                 
                 print(f"✅ Added {item_id} to {uid}'s {index_type}")
                 return True
@@ -545,6 +744,7 @@ class FirebaseService:
                     f"stats.{stat_key}": stats[stat_key],
                     "updated_at": datetime.utcnow()
                 })
+                self.invalidate_user_indexes(uid)
                 
                 print(f"✅ Removed {item_id} from {uid}'s {index_type}")
                 return True
@@ -555,17 +755,30 @@ class FirebaseService:
             print(f"❌ Failed to remove from user index: {e}")
             return False
     
+    def invalidate_user_indexes(self, uid: str) -> None:
+        """Drop the cached copy of a user's indexes after they change"""
+        self._index_cache.pop(uid, None)
+        # Indexes and stats live on the profile document too
+        self.invalidate_user_profile(uid)
+    
     async def get_user_indexes(self, uid: str) -> Dict[str, List[str]]:
-        """Get user's document indexes"""
+        """Get user's document indexes (cached briefly, invalidated on index writes)"""
         try:
             if not self._initialized or not self.db:
                 raise RuntimeError("Firebase service not initialized")
+            
+            cached = self._index_cache.get(uid)
+            if cached is not None:
+                return cached
+            
             user_ref = self.get_user_document_ref(uid)
             doc = user_ref.get()
             
             if doc.exists:
                 user_data = doc.to_dict()
-                return user_data.get("indexes", self._get_empty_indexes())
+                indexes = user_data.get("indexes", self._get_empty_indexes())
+                self._index_cache[uid] = indexes
+                return indexes
             else:
                 await self.initialize_user_indexes(uid)
                 return self._get_empty_indexes()
@@ -580,7 +793,10 @@ class FirebaseService:
     index_type: str, 
     collection: str, 
     limit: Optional[int] = None,
-    offset: Optional[int] = None
+    offset: Optional[int] = None,
+    order_by: Optional[str] = None,  # e.g. "-updated_at"
+    fields: Optional[List[str]] = None,  # project to these fields; None for whole documents
+    start_after: Optional[Tuple[Any, str]] = None  # (order_by value, id) of the last item already seen
 ) -> List[Dict[str, Any]]:
         """Get user's items using their index (super fast!)"""
         try:
@@ -592,6 +808,13 @@ class FirebaseService:
             if not item_ids:
                 return []
             
+            if order_by:
+                # Let Firestore do the ordering instead of sorting in Python
+                return await self.get_documents_by_ids_ordered(
+                    collection, item_ids, order_by,
+                    limit=limit, offset=offset, fields=fields, start_after=start_after
+                )
+            
             # Apply offset and limit to the item_ids list
             start_idx = offset if offset else 0
             end_idx = start_idx + limit if limit else None
@@ -599,19 +822,73 @@ class FirebaseService:
             # Slice the item_ids based on pagination
             paginated_ids = item_ids[start_idx:end_idx]
             
-            # Get documents by IDs
-            items = []
-            for item_id in paginated_ids:
-                doc = await self.get_document(collection, item_id)
-                if doc:
-                    items.append(doc)
-            
-            return items
+            # Get documents by IDs in a single batched read
+            return await self.get_many(collection, paginated_ids, fields=fields)
             
         except Exception as e:
             print(f"❌ Failed to get user items by index: {e}")
             return []
     
+    async def get_documents_by_ids_ordered(
+        self,
+        collection: str,
+        doc_ids: List[str],
+        order_by: str,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        start_after: Optional[Tuple[Any, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get documents by ID, ordered and limited server-side
+        
+        Ties on the ordering field are broken by document id, so a page can be
+        resumed with start_after=(value, id) taken from its last item.
+        """
+        if not self._initialized or not self.db:
+            raise RuntimeError("Firebase service not initialized")
+        
+        descending = order_by.startswith('-')
+        field = order_by.lstrip('-')
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        start_idx = offset if offset else 0
+        chunk_limit = start_idx + limit if limit else None
+        
+        # The merge below needs the ordering field even when projecting
+        if fields is not None and field not in fields:
+            fields = [*fields, field]
+        
+        collection_ref = self.db.collection(collection)
+        queries = []
+        
+        # "in" filters are capped, so query the IDs in chunks; each chunk comes back
+        # already ordered and only needs to be merged
+        for i in range(0, len(doc_ids), FIRESTORE_IN_QUERY_LIMIT):
+            refs = [collection_ref.document(doc_id) for doc_id in doc_ids[i:i + FIRESTORE_IN_QUERY_LIMIT]]
+            query = collection_ref.where(firestore.FieldPath.document_id(), "in", refs)
+            query = query.order_by(field, direction=direction)
+            query = query.order_by(firestore.FieldPath.document_id(), direction=direction)
+            if start_after:
+                query = query.start_after([start_after[0], collection_ref.document(start_after[1])])
+            if fields is not None:
+                query = query.select(fields)
+            if chunk_limit:
+                query = query.limit(chunk_limit)
+            queries.append(query)
+        
+        def _read_chunk(query) -> List[Dict[str, Any]]:
+            chunk = []
+            for doc in query.stream():
+                data = doc.to_dict()
+                data['id'] = doc.id
+                chunk.append(data)
+            return chunk
+        
+        # The blocking streams run in threads, so the chunks are read concurrently
+        chunk_results = await asyncio.gather(*(asyncio.to_thread(_read_chunk, query) for query in queries))
+        
+        merged = heapq.merge(*chunk_results, key=lambda item: (item[field], item['id']), reverse=descending)
+        return list(islice(merged, start_idx, chunk_limit))
+    
     def _get_stat_key_for_index(self, index_type: str) -> Optional[str]:
         """Map index type to corresponding stat key"""
         mapping = {
@@ -621,20 +898,129 @@ class FirebaseService:
             "note_ids": "total_notes"
         }
         return mapping.get(index_type)
+    
+    def _get_summary_map_for_index(self, index_type: str) -> Optional[str]:
+        """Map index type to the user-doc field holding per-item summaries"""
+        mapping = {
+            "document_ids": "document_summaries"
+        }
+        return mapping.get(index_type)
+    
+    def _get_recent_key_for_index(self, index_type: str) -> Optional[str]:
+        """Map index type to its bounded newest-first list inside indexes"""
+        mapping = {
+            "conversation_ids": "recent_conversation_ids",
+            "document_ids": "recent_document_ids"
+        }
+        return mapping.get(index_type)
+    
+    def recent_ids_from_indexes(self, indexes: Dict[str, Any], index_type: str, count: int = RECENT_INDEX_SIZE) -> List[str]:
+        """Newest-first ids for an index, from the bounded recent list when it is usable
+        
+        Users written before the recent lists existed (or whose list was shortened
+        by deletes) fall back to the tail of the full index.
+        """
+        item_ids = indexes.get(index_type, [])
+        recent_key = self._get_recent_key_for_index(index_type)
+        recent = indexes.get(recent_key) if recent_key else None
+        
+        if recent is not None and len(recent) >= min(count, len(item_ids)):
+            return recent[:count]
+        return list(reversed(item_ids[-count:])) if count else []
+    
+    def _build_summary(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Pick the list-view fields out of a full item"""
+        return {key: data[key] for key in DOCUMENT_SUMMARY_FIELDS if key in data}
+    
+    async def get_user_items_from_summaries(
+        self,
+        uid: str,
+        index_type: str,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple[Any, str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get the newest-first list view from the summaries on the user doc (one read)
+        
+        Returns None when some indexed item has no summary yet, so the caller can
+        fall back to get_user_items_by_index.
+        """
+        map_field = self._get_summary_map_for_index(index_type)
+        if not map_field:
+            return None
+        
+        doc = await asyncio.to_thread(self.get_user_document_ref(uid).get)
+        if not doc.exists:
+            return None
+        
+        user_data = doc.to_dict()
+        indexes = user_data.get("indexes", self._get_empty_indexes())
+        self._index_cache[uid] = indexes
+        
+        summaries = user_data.get(map_field, {})
+        item_ids = indexes.get(index_type, [])
+        if any(item_id not in summaries for item_id in item_ids):
+            return None
+        
+        items = [{"id": item_id, **summaries[item_id]} for item_id in item_ids]
+        items.sort(key=lambda item: (item["updated_at"], item["id"]), reverse=True)
+        
+        if start_after:
+            items = [item for item in items if (item["updated_at"], item["id"]) < start_after]
+        return items[:limit] if limit else items
 
     # ============================================================================
     # CHAT/CONVERSATION OPERATIONS
     # ============================================================================
     
     async def create_document_with_index(self, collection: str, data: Dict[str, Any], user_id: str, index_type: str, doc_id: str = None) -> str:
-        """Create document and add to user's index atomically"""
+        """Create document and add to user's index atomically (single transaction)"""
         try:
-            # Create the document
-            doc_id = await self.create_document(collection, data, doc_id)
+            if not self._initialized or not self.db:
+                raise RuntimeError("Firebase service not initialized")
+            if not doc_id:
+                doc_id = str(uuid.uuid4())
             
-            # Add to user's index
-            await self.add_to_user_index(user_id, index_type, doc_id)
+            # Add metadata; the owner is always the user whose index lists the document
+            now = datetime.utcnow()
+            data['id'] = doc_id
+            data['user_id'] = user_id
+            data['created_at'] = now
+            data['updated_at'] = now
             
+            doc_ref = self.db.collection(collection).document(doc_id)
+            user_ref = self.get_user_document_ref(user_id)
+            stat_key = self._get_stat_key_for_index(index_type)
+            summary_map = self._get_summary_map_for_index(index_type)
+            recent_key = self._get_recent_key_for_index(index_type)
+            
+            # A transaction so the bounded recent list can't lose concurrent inserts
+            @firestore.transactional
+            def _create(transaction):
+                snapshot = user_ref.get(transaction=transaction)
+                indexes = (snapshot.to_dict() or {}).get("indexes", {}) if snapshot.exists else {}
+                
+                index_update = {
+                    "indexes": {index_type: firestore.ArrayUnion([doc_id])},
+                    "updated_at": now
+                }
+                if summary_map:
+                    index_update[summary_map] = {doc_id: self._build_summary(data)}
+                
+                # Only bump the counter for ids the index doesn't already hold
+                if stat_key and doc_id not in indexes.get(index_type, []):
+                    index_update["stats"] = {stat_key: firestore.Increment(1)}
+                
+                if recent_key:
+                    recent = self.recent_ids_from_indexes(indexes, index_type, RECENT_INDEX_SIZE - 1)
+                    index_update["indexes"][recent_key] = [doc_id] + [i for i in recent if i != doc_id]
+                
+                transaction.set(doc_ref, data)
+                transaction.set(user_ref, index_update, merge=True)
+            
+            await asyncio.to_thread(_create, self.db.transaction())
+            self.invalidate_user_indexes(user_id)
+            
+            print(f"✅ Created document {doc_id} in {collection} and added to {user_id}'s {index_type}")
             return doc_id
             
         except Exception as e:
@@ -642,20 +1028,103 @@ class FirebaseService:
             raise e
     
     async def delete_document_with_index(self, collection: str, doc_id: str, user_id: str, index_type: str) -> bool:
-        """Delete document and remove from user's index atomically"""
+        """Delete the user's document and remove it from their index atomically (single transaction)
+        
+        Returns False, deleting nothing, when the document is missing or belongs to another user.
+        """
         try:
-            # Remove from user's index
-            await self.remove_from_user_index(user_id, index_type, doc_id)
+            if not self._initialized or not self.db:
+                raise RuntimeError("Firebase service not initialized")
+            
+            doc_ref = self.db.collection(collection).document(doc_id)
+            user_ref = self.get_user_document_ref(user_id)
+            stat_key = self._get_stat_key_for_index(index_type)
+            summary_map = self._get_summary_map_for_index(index_type)
+            recent_key = self._get_recent_key_for_index(index_type)
+            
+            # The user doc is read inside the transaction rather than from the
+            # per-worker index cache, which can be stale on other workers
+            @firestore.transactional
+            def _delete(transaction) -> bool:
+                snapshot = doc_ref.get(transaction=transaction)
+                user_snapshot = user_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return False
+                indexes = (user_snapshot.to_dict() or {}).get("indexes", {}) if user_snapshot.exists else {}
+                
+                # Documents written without a user_id (older AI-generated ones) belong
+                # to the user whose index lists them
+                owner = (snapshot.to_dict() or {}).get("user_id")
+                if owner is None:
+                    if doc_id not in indexes.get(index_type, []):
+                        return False
+                elif owner != user_id:
+                    return False
+                
+                transaction.delete(doc_ref)
+                if not user_snapshot.exists:
+                    return True
+                
+                # ArrayRemove and DELETE_FIELD are no-ops for ids that aren't there,
+                # so they always run; only the counter depends on the index
+                index_update = {
+                    f"indexes.{index_type}": firestore.ArrayRemove([doc_id]),
+                    "updated_at": datetime.utcnow()
+                }
+                if stat_key and doc_id in indexes.get(index_type, []):
+                    index_update[f"stats.{stat_key}"] = firestore.Increment(-1)
+                if summary_map:
+                    index_update[f"{summary_map}.{doc_id}"] = firestore.DELETE_FIELD
+                if recent_key:
+                    index_update[f"indexes.{recent_key}"] = firestore.ArrayRemove([doc_id])
+                transaction.update(user_ref, index_update)
+                return True
             
-            # Delete the document
-            success = await self.delete_document(collection, doc_id)
+            deleted = await asyncio.to_thread(_delete, self.db.transaction())
+            if not deleted:
+                print(f"⚠️ Document {doc_id} not found in {collection} for {user_id}")
+                return False
+            self.invalidate_user_indexes(user_id)
             
-            return success
+            print(f"✅ Deleted document {doc_id} from {collection} and {user_id}'s {index_type}")
+            return True
             
         except Exception as e:
             print(f"❌ Failed to delete document with index: {e}")
             return False
     
+    async def update_document_with_index(
+        self,
+        collection: str,
+        doc_id: str,
+        user_id: str,
+        index_type: str,
+        update_data: Dict[str, Any],
+        current_data: Dict[str, Any]
+    ) -> bool:
+        """Update document and its summary on the user doc atomically (single batched write)"""
+        try:
+            if not self._initialized or not self.db:
+                raise RuntimeError("Firebase service not initialized")
+            update_data['updated_at'] = datetime.utcnow()
+            
+            batch = self.db.batch()
+            batch.update(self.db.collection(collection).document(doc_id), update_data)
+            
+            summary_map = self._get_summary_map_for_index(index_type)
+            if summary_map:
+                summary = self._build_summary({**current_data, **update_data})
+                batch.set(self.get_user_document_ref(user_id), {summary_map: {doc_id: summary}}, merge=True)
+            
+            await asyncio.to_thread(batch.commit)
+            
+            print(f"✅ Updated document {doc_id} in {collection}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Failed to update document with index: {e}")
+            return False
+    
     async def save_chat_messages_with_indexes(
         self, 
         user_id: str, 
@@ -689,12 +1158,25 @@ class FirebaseService:
                 "timestamp": timestamp
             }
             
-            # Save messages
-            await self.create_document("chat_history", user_msg_data)
-            await self.create_document("chat_history", ai_msg_data)
+            # Counter updates are computed from the cached profile, so the user
+            # doc is not read on every message
+            profile = await self.get_user_profile(user_id, use_cache=True)
+            if profile is None:
+                await self.initialize_user_indexes(user_id)
+                profile = {}
+            
+            writes = []
+            for msg_data in (user_msg_data, ai_msg_data):
+                doc_id = str(uuid.uuid4())
+                msg_data['id'] = doc_id
+                msg_data['created_at'] = timestamp
+                msg_data['updated_at'] = timestamp
+                writes.append((self.db.collection("chat_history").document(doc_id), msg_data))
             
-            # Update user stats efficiently
-            await self.update_user_message_stats_efficient(user_id, 2)  # 2 new messages
+            # Both messages and the user's counters in one write
+            await self._write_with_message_stats(user_id, profile.get("stats", {}), 2, writes)  # 2 new messages
+            self.invalidate_messages_today(user_id)
+            self.invalidate_user_profile(user_id)
             
             print(f"✅ Saved chat messages for conversation {conversation_id}")
             return True
@@ -703,33 +1185,92 @@ class FirebaseService:
             print(f"❌ Failed to save chat messages: {e}")
             return False
     
+    def _message_stats_update(self, stats: Dict[str, Any], message_count: int, now: datetime) -> Dict[str, Any]:
+        """Stats fields to merge onto the user doc for newly saved messages
+        
+        The counters use Increment so concurrent saves can't overwrite each other.
+        messages_today belongs to messages_today_date and restarts from this save
+        when `stats` (which must be fresh in that case) has another day or none.
+        It only ever counts messages saved through here; it is not seeded from
+        chat_history, which also holds the per-exchange copies written by the
+        AI service's message history.
+        """
+        today = now.date().isoformat()
+        
+        update = {
+            "total_messages": firestore.Increment(message_count),
+            "messages_today_date": today,
+            "last_message_at": now,
+            "last_activity": now
+        }
+        if stats.get("messages_today_date") == today:
+            update["messages_today"] = firestore.Increment(message_count)
+        else:
+            update["messages_today"] = message_count
+        
+        # Derived metrics from the counters as they will be after this save
+        update.update(self.compute_derived_stats({
+            **stats,
+            "total_messages": stats.get("total_messages", 0) + message_count
+        }))
+        return update
+    
+    async def _write_with_message_stats(
+        self,
+        uid: str,
+        cached_stats: Dict[str, Any],
+        message_count: int,
+        writes: List[Tuple[Any, Dict[str, Any]]]
+    ) -> None:
+        """Commit `writes` ((ref, data) sets) together with the counters for message_count new messages
+        
+        When the cached stats already belong to today, everything goes in one
+        batch of Increments. Otherwise messages_today has to restart, and that is
+        decided in a transaction on a fresh read of the user doc, so a save that
+        started the day at the same time isn't overwritten by the reset.
+        """
+        now = datetime.utcnow()
+        user_ref = self.get_user_document_ref(uid)
+        
+        if cached_stats.get("messages_today_date") == now.date().isoformat():
+            batch = self.db.batch()
+            for ref, data in writes:
+                batch.set(ref, data)
+            batch.set(user_ref, {
+                "stats": self._message_stats_update(cached_stats, message_count, now),
+                "updated_at": now
+            }, merge=True)
+            await asyncio.to_thread(batch.commit)
+            return
+        
+        @firestore.transactional
+        def _write(transaction):
+            snapshot = user_ref.get(transaction=transaction)
+            stats = (snapshot.to_dict() or {}).get("stats", {}) if snapshot.exists else {}
+            for ref, data in writes:
+                transaction.set(ref, data)
+            transaction.set(user_ref, {
+                "stats": self._message_stats_update(stats, message_count, now),
+                "updated_at": now
+            }, merge=True)
+        
+        await asyncio.to_thread(_write, self.db.transaction())
+    
     async def update_user_message_stats_efficient(self, uid: str, message_count: int = 1) -> bool:
         """Update user message stats efficiently without reading all messages"""
         try:
             if not self._initialized or not self.db:
                 raise RuntimeError("Firebase service not initialized")
-            user_ref = self.get_user_document_ref(uid)
             
-            # Get current stats
-            doc = user_ref.get()
-            if not doc.exists:
+            profile = await self.get_user_profile(uid, use_cache=True)
+            if profile is None:
                 await self.initialize_user_indexes(uid)
-                doc = user_ref.get()
+                profile = {}
             
-            user_data = doc.to_dict()
-            stats = user_data.get("stats", self._get_empty_stats())
-            
-            # Update message counts
-            stats["total_messages"] = stats.get("total_messages", 0) + message_count
-            stats["messages_today"] = stats.get("messages_today", 0) + message_count
-            stats["last_message_at"] = datetime.utcnow()
-            stats["last_activity"] = datetime.utcnow()
-            
-            # Update in Firestore
-            user_ref.update({
-                "stats": stats,
-                "updated_at": datetime.utcnow()
-            })
+            # Merge the increments in; no read-modify-write of the stats map
+            await self._write_with_message_stats(uid, profile.get("stats", {}), message_count, [])
+            self.invalidate_messages_today(uid)
+            self.invalidate_user_profile(uid)
             
             return True
             
@@ -757,12 +1298,14 @@ class FirebaseService:
                 stats[key] = value
             
             stats["last_activity"] = datetime.utcnow()
+            stats.update(self.compute_derived_stats(stats))
             
             # Update in Firestore
             user_ref.update({
                 "stats": stats,
                 "updated_at": datetime.utcnow()
             })
+            self.invalidate_user_profile(uid)
             
             return True
             
@@ -844,8 +1387,10 @@ class FirebaseService:
             )
             
             document_ids = []
+            document_summaries = {}
             for doc in documents:
                 document_ids.append(doc["id"])
+                document_summaries[doc["id"]] = self._build_summary(doc)
             
             # Count messages for stats
             messages = await self.query_documents(
@@ -872,16 +1417,68 @@ class FirebaseService:
                     "last_activity": datetime.utcnow(),
                     "last_message_at": messages[-1].get("timestamp") if messages else None
                 },
+                "document_summaries": document_summaries,
+                "schema_version": USER_SCHEMA_VERSION,
                 "updated_at": datetime.utcnow()
             }
+            user_data["stats"].update(self.compute_derived_stats(user_data["stats"]))
             
             # Update user document
             user_ref = self.get_user_document_ref(uid)
             user_ref.update(user_data)
+            self.invalidate_user_indexes(uid)
             
             print(f"✅ Migrated user {uid}: {len(conversation_ids)} conversations, {len(document_ids)} documents, {len(messages)} messages")
             return True
             
         except Exception as e:
             print(f"❌ Failed to migrate user {uid}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def get_users_needing_migration(self) -> List[Dict[str, Any]]:
+        """Get users whose schema_version is below the indexed structure (filtered by Firestore)"""
+        return await self.query_documents(
+            "users",
+            filters=[("schema_version", "<", USER_SCHEMA_VERSION)]
+        )
+    
+    async def backfill_user_schema_versions(self) -> int:
+        """One-time pass that tags users created before schema_version existed
+        
+        Users that already have conversation indexes are tagged as migrated,
+        everyone else as legacy so get_users_needing_migration picks them up.
+        Returns the number of users tagged.
+        """
+        if not self._initialized or not self.db:
+            raise RuntimeError("Firebase service not initialized")
+        
+        def _backfill() -> int:
+            # Only the fields needed to decide, not whole user documents
+            snapshots = self.db.collection("users").select(["schema_version", "indexes"]).stream()
+            batch = self.db.batch()
+            pending = 0
+            tagged = 0
+            
+            for snapshot in snapshots:
+                data = snapshot.to_dict() or {}
+                if "schema_version" in data:
+                    continue
+                
+                indexes = data.get("indexes") or {}
+                version = USER_SCHEMA_VERSION if indexes.get("conversation_ids") else LEGACY_USER_SCHEMA_VERSION
+                batch.update(snapshot.reference, {"schema_version": version})
+                pending += 1
+                tagged += 1
+                
+                if pending == FIRESTORE_BATCH_LIMIT:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending = 0
+            
+            if pending:
+                batch.commit()
+            return tagged
+        
+        tagged = await asyncio.to_thread(_backfill)
+        print(f"✅ Tagged {tagged} users with schema_version")
+        return tagged
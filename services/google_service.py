@@ -3,9 +3,12 @@ from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import google_auth_httplib2
+import httplib2
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import json
 import os
 
@@ -20,6 +23,10 @@ class GoogleService:
         self.client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
         self.redirect_uri = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/google/callback")
         
+        # One persistent HTTP transport shared by every API client we build, so
+        # connections (and their TLS sessions) are kept alive between calls
+        self._http = httplib2.Http(timeout=30)
+        
         # OAuth scopes for Google Workspace
         self.scopes = [
             'openid',  # Add openid first to prevent scope mismatch
@@ -30,6 +37,25 @@ class GoogleService:
             'https://www.googleapis.com/auth/calendar'
         ]
     
+    def _build_service(
+        self,
+        service_name: str,
+        version: str,
+        credentials: Credentials,
+        http: Optional[httplib2.Http] = None
+    ):
+        """Build a Google API client on top of the shared HTTP transport
+        
+        httplib2.Http is not thread-safe, so clients used from a worker thread
+        must be given their own transport via `http`.
+        """
+        authorized_http = google_auth_httplib2.AuthorizedHttp(credentials, http=http or self._http)
+        return build(service_name, version, http=authorized_http, cache_discovery=False)
+    
+    def close(self):
+        """Close the shared HTTP connections"""
+        self._http.close()
+    
     # ========================================================================
     # OAUTH FLOW
     # ========================================================================
@@ -87,7 +113,7 @@ class GoogleService:
             credentials = flow.credentials
             
             # Get user info from Google
-            user_info_service = build('oauth2', 'v2', credentials=credentials)
+            user_info_service = self._build_service('oauth2', 'v2', credentials)
             user_info = user_info_service.userinfo().get().execute()
             
             # Store tokens in Firebase
@@ -239,7 +265,7 @@ class GoogleService:
             credentials = flow.credentials
             
             # Get user info from Google
-            user_info_service = build('oauth2', 'v2', credentials=credentials)
+            user_info_service = self._build_service('oauth2', 'v2', credentials)
             user_info = user_info_service.userinfo().get().execute()
             
             # Store tokens in Firebase
@@ -361,16 +387,10 @@ class GoogleService:
             if not credentials:
                 raise Exception("Google account not connected")
             
-            # Create the document using Google Docs API
-            docs_service = build('docs', 'v1', credentials=credentials)
             doc = {
                 'title': title
             }
             
-            # Create the document
-            document = docs_service.documents().create(body=doc).execute()
-            document_id = document.get('documentId')
-            
             # Insert content into the document
             requests_body = {
                 'requests': [
@@ -385,10 +405,24 @@ class GoogleService:
                 ]
             }
             
-            docs_service.documents().batchUpdate(
-                documentId=document_id,
-                body=requests_body
-            ).execute()
+            def _create() -> str:
+                # execute() blocks, so this runs in a worker thread on its own transport
+                http = httplib2.Http(timeout=30)
+                try:
+                    # Create the document using Google Docs API
+                    docs_service = self._build_service('docs', 'v1', credentials, http=http)
+                    document = docs_service.documents().create(body=doc).execute()
+                    document_id = document.get('documentId')
+                    
+                    docs_service.documents().batchUpdate(
+                        documentId=document_id,
+                        body=requests_body
+                    ).execute()
+                    return document_id
+                finally:
+                    http.close()
+            
+            document_id = await asyncio.to_thread(_create)
             
             # Generate the shareable URL
             document_url = f"https://docs.google.com/document/d/{document_id}/edit"
@@ -417,7 +451,7 @@ class GoogleService:
             if not credentials:
                 raise ValueError("Google account not connected")
             
-            docs_service = build('docs', 'v1', credentials=credentials)
+            docs_service = self._build_service('docs', 'v1', credentials)
             
             # Get current document
             doc = docs_service.documents().get(documentId=document_id).execute()
@@ -475,7 +509,7 @@ class GoogleService:
             if not credentials:
                 raise ValueError("Google account not connected")
             
-            drive_service = build('drive', 'v3', credentials=credentials)
+            drive_service = self._build_service('drive', 'v3', credentials)
             
             # Query files
             query = f"mimeType='{file_type}' and trashed=false"
@@ -511,7 +545,7 @@ class GoogleService:
                 print(f"❌ No valid credentials for user {user_id}")
                 return []
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = self._build_service('calendar', 'v3', credentials)
             
             # ✅ FIX: Proper date parsing and timezone handling
             try:
@@ -603,7 +637,7 @@ class GoogleService:
             if not credentials:
                 raise ValueError("Google account not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = self._build_service('calendar', 'v3', credentials)
             
             # Get existing event
             existing_event = service.events().get(
@@ -644,7 +678,7 @@ class GoogleService:
             if not credentials:
                 raise ValueError("Google account not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = self._build_service('calendar', 'v3', credentials)
             
             # Delete the event
             service.events().delete(
@@ -760,8 +794,8 @@ class GoogleService:
                 # We'll try to use the access_token as is, knowing it will expire eventually
             
             # Create credentials object using the stored values OR environment variables
-            client_id = google_tokens.get("client_id") or os.getenv("GOOGLE_CLIENT_ID")
-            client_secret = google_tokens.get("client_secret") or os.getenv("GOOGLE_CLIENT_SECRET")
+            client_id = google_tokens.get("client_id") or self.client_id
+            client_secret = google_tokens.get("client_secret") or self.client_secret
             token_uri = google_tokens.get("token_uri") or "https://oauth2.googleapis.com/token"
             scopes = google_tokens.get("scopes") or [
                 'https://www.googleapis.com/auth/calendar.readonly',
@@ -852,7 +886,7 @@ class GoogleService:
             if not credentials:
                 raise ValueError("Google account not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = self._build_service('calendar', 'v3', credentials)
             
             # ✅ FIX: Handle different date formats for start/end times
             def format_datetime_for_google(dt_input, default_timezone='Africa/Johannesburg'):
@@ -980,7 +1014,7 @@ class GoogleService:
             if not credentials:
                 return None
             
-            oauth2_service = build('oauth2', 'v2', credentials=credentials)
+            oauth2_service = self._build_service('oauth2', 'v2', credentials)
             user_info = oauth2_service.userinfo().get().execute()
             
             return user_info
@@ -997,7 +1031,7 @@ class GoogleService:
                 return {"connected": False, "error": "No credentials found"}
             
             # Test the connection by making a simple API call
-            oauth2_service = build('oauth2', 'v2', credentials=credentials)
+            oauth2_service = self._build_service('oauth2', 'v2', credentials)
             user_info = oauth2_service.userinfo().get().execute()
             
             return {
@@ -37,7 +37,7 @@ class PlannerService:
             task_id = await self.firebase_service.create_document("tasks", task_data)
             created_task = await self.firebase_service.get_document("tasks", task_id)
             
-            return TaskResponse(**created_task)
+            return TaskResponse.model_validate(created_task)
             
         except Exception as e:
             raise Exception(f"Failed to create task: {e}")
@@ -71,7 +71,7 @@ class PlannerService:
                 limit=limit
             )
             
-            return [TaskResponse(**task) for task in tasks]
+            return [TaskResponse.model_validate(task) for task in tasks]
             
         except Exception as e:
             raise Exception(f"Failed to get tasks: {e}")
@@ -86,7 +86,7 @@ class PlannerService:
             if not task:
                 raise ValueError("Task not found")
             
-            return TaskResponse(**task)
+            return TaskResponse.model_validate(task)
             
         except Exception as e:
             raise Exception(f"Failed to get task: {e}")
@@ -122,7 +122,7 @@ class PlannerService:
             await self.firebase_service.update_document("tasks", task_id, update_data)
             updated_task = await self.firebase_service.get_document("tasks", task_id)
             
-            return TaskResponse(**updated_task)
+            return TaskResponse.model_validate(updated_task)
             
         except Exception as e:
             raise Exception(f"Failed to update task: {e}")
@@ -153,7 +153,7 @@ class PlannerService:
                 order_by="due_date"
             )
             
-            return [TaskResponse(**task) for task in tasks]
+            return [TaskResponse.model_validate(task) for task in tasks]
             
         except Exception as e:
             raise Exception(f"Failed to get overdue tasks: {e}")
@@ -175,7 +175,7 @@ class PlannerService:
                 order_by="due_date"
             )
             
-            return [TaskResponse(**task) for task in tasks]
+            return [TaskResponse.model_validate(task) for task in tasks]
             
         except Exception as e:
             raise Exception(f"Failed to get tasks due today: {e}")
@@ -204,7 +204,7 @@ class PlannerService:
             note_id = await self.firebase_service.create_document("notes", note_data)
             created_note = await self.firebase_service.get_document("notes", note_id)
             
-            return NoteResponse(**created_note)
+            return NoteResponse.model_validate(created_note)
             
         except Exception as e:
             raise Exception(f"Failed to create note: {e}")
@@ -233,7 +233,7 @@ class PlannerService:
                 limit=limit
             )
             
-            return [NoteResponse(**note) for note in notes]
+            return [NoteResponse.model_validate(note) for note in notes]
             
         except Exception as e:
             raise Exception(f"Failed to get notes: {e}")
@@ -248,7 +248,7 @@ class PlannerService:
             if not note:
                 raise ValueError("Note not found")
             
-            return NoteResponse(**note)
+            return NoteResponse.model_validate(note)
             
         except Exception as e:
             raise Exception(f"Failed to get note: {e}")
@@ -278,7 +278,7 @@ class PlannerService:
             await self.firebase_service.update_document("notes", note_id, update_data)
             updated_note = await self.firebase_service.get_document("notes", note_id)
             
-            return NoteResponse(**updated_note)
+            return NoteResponse.model_validate(updated_note)
             
         except Exception as e:
             raise Exception(f"Failed to update note: {e}")
@@ -306,7 +306,7 @@ class PlannerService:
                 limit=limit
             )
             
-            return [NoteResponse(**note) for note in notes]
+            return [NoteResponse.model_validate(note) for note in notes]
             
         except Exception as e:
             raise Exception(f"Failed to search notes: {e}")
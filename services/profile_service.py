@@ -1,6 +1,7 @@
 # services/profile_service.py - COMPLETE LOCAL STORAGE VERSION
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta, timezone
+import asyncio
 import uuid
 import os
 import shutil
@@ -9,6 +10,13 @@ from models.user_models import UserUpdate, UserResponse, ProfileStats, Notificat
 from services.firebase_service import FirebaseService
 from services.auth_service import AuthService
 
+# Largest avatar accepted, and the chunk size used when writing it to disk
+MAX_AVATAR_BYTES = int(os.getenv("MAX_AVATAR_BYTES", str(5 * 1024 * 1024)))
+AVATAR_COPY_CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the image formats accepted as avatars
+HEIF_BRANDS = (b"heic", b"heix", b"hevc", b"mif1")
+
 class ProfileService:
     """Service for user profile operations with local file storage"""
     
@@ -17,13 +25,14 @@ class ProfileService:
         self.auth_service = auth_service
         self.upload_dir = "uploads"
         self.avatar_dir = os.path.join(self.upload_dir, "avatars")
+        self.server_base_url = os.getenv("SERVER_BASE_URL", "http://localhost:8000")
         
         # Ensure directories exist
         os.makedirs(self.avatar_dir, exist_ok=True)
     
     def get_server_url(self) -> str:
         """Get the server base URL for file serving"""
-        return os.getenv("SERVER_BASE_URL", "http://localhost:8000")
+        return self.server_base_url
     
     async def update_profile(self, uid: str, profile_update: UserUpdate) -> UserResponse:
         """Update user profile information"""
@@ -46,12 +55,38 @@ class ProfileService:
             
             # Get updated profile
             updated_profile = await self.firebase_service.get_user_profile(uid)
-            return UserResponse(**updated_profile)
+            return UserResponse.model_validate(updated_profile)
             
         except Exception as e:
             raise Exception(f"Failed to update profile: {e}")
     
-    async def upload_avatar(self, uid: str, file: UploadFile) -> str:
+    def detect_image_extension(self, file: UploadFile) -> Optional[str]:
+        """File extension for an uploaded image, judged from its first bytes
+        
+        The client-supplied content type and filename are not trusted. Returns
+        None when the data isn't a supported image format.
+        """
+        header = file.file.read(16)
+        file.file.seek(0)
+        
+        if header.startswith(b"\xff\xd8\xff"):
+            return "jpg"
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "png"
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return "gif"
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return "webp"
+        if header[4:8] == b"ftyp" and header[8:12] in HEIF_BRANDS:
+            return "heic"
+        return None
+    
+    def _write_avatar(self, source, file_path: str) -> None:
+        """Copy the upload to disk in fixed-size chunks"""
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(source, buffer, length=AVATAR_COPY_CHUNK_SIZE)
+    
+    async def upload_avatar(self, uid: str, file: UploadFile, file_extension: Optional[str] = None) -> str:
         """Upload user avatar to local storage"""
         try:
             # Clean up old avatar files for this user
@@ -66,13 +101,13 @@ class ProfileService:
                 print(f"Warning: Could not clean up old avatar files: {cleanup_error}")
             
             # Generate unique filename
-            file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
+            if not file_extension:
+                file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
             filename = f"{uid}_{uuid.uuid4().hex[:8]}.{file_extension}"
             file_path = os.path.join(self.avatar_dir, filename)
             
-            # Save file to local storage
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # Save file to local storage (streamed, off the event loop)
+            await asyncio.to_thread(self._write_avatar, file.file, file_path)
             
             # Generate public URL
             avatar_url = f"{self.get_server_url()}/uploads/avatars/{filename}"
@@ -92,14 +127,18 @@ class ProfileService:
         except Exception as e:
             raise Exception(f"Failed to upload avatar: {e}")
     
-    async def get_user_stats(self, uid: str) -> ProfileStats:
-        """Get user activity statistics"""
+    async def get_user_stats(self, uid: str, user_profile: Optional[Dict[str, Any]] = None) -> ProfileStats:
+        """Get user activity statistics
+        
+        Pass the profile already loaded for this request to skip the lookup.
+        """
         try:
             # For now, return mock data since we don't have task/document collections yet
             # In a real app, you'd query your Firestore collections
             
-            # Mock data based on user account age
-            user_profile = await self.firebase_service.get_user_profile(uid)
+            # Mock data based on user account age (a profile up to a few seconds old is fine)
+            if user_profile is None:
+                user_profile = await self.firebase_service.get_user_profile(uid, use_cache=True)
             if not user_profile:
                 return ProfileStats(uid=uid)
             
@@ -165,22 +204,23 @@ class ProfileService:
             print(f"Error getting user stats: {e}")
             return ProfileStats(uid=uid)
     
-    async def get_notification_settings(self, uid: str) -> NotificationSettings:
+    async def get_notification_settings(self, uid: str, user_profile: Optional[Dict[str, Any]] = None) -> NotificationSettings:
         """Get user's notification preferences from Firestore"""
         try:
-            # Try to get existing settings from user's subcollection
-            settings_doc = self.firebase_service.db.document(f"users/{uid}").get()
+            # Settings live on the user document, which is cached briefly
+            if user_profile is None:
+                user_profile = await self.firebase_service.get_user_profile(uid, use_cache=True)
             
-            if settings_doc.exists:
-                settings_data = settings_doc.to_dict()
-                notification_settings = settings_data.get('notification_settings')
+            if user_profile:
+                notification_settings = user_profile.get('notification_settings')
                 
                 if notification_settings:
-                    notification_settings['uid'] = uid
-                    return NotificationSettings(**notification_settings)
+                    return NotificationSettings(**{**notification_settings, 'uid': uid})
             
             # Return default settings if none exist
             default_settings = NotificationSettings(uid=uid)
+            if not user_profile:
+                return default_settings
             
             # Save default settings to Firestore
             try:
@@ -189,6 +229,7 @@ class ProfileService:
                     "notification_settings": default_settings.dict(),
                     "updated_at": datetime.now(timezone.utc)
                 })
+                self.firebase_service.invalidate_user_profile(uid)
             except Exception as save_error:
                 print(f"Warning: Could not save default notification settings: {save_error}")
             
@@ -215,6 +256,7 @@ class ProfileService:
                 "notification_settings": settings_data,
                 "updated_at": datetime.now(timezone.utc)
             })
+            self.firebase_service.invalidate_user_profile(uid)
             
             print(f"Notification settings updated for user {uid}")
             return settings
@@ -222,22 +264,23 @@ class ProfileService:
         except Exception as e:
             raise Exception(f"Failed to update notification settings: {e}")
     
-    async def get_user_preferences(self, uid: str) -> UserPreferences:
+    async def get_user_preferences(self, uid: str, user_profile: Optional[Dict[str, Any]] = None) -> UserPreferences:
         """Get user's app preferences from Firestore"""
         try:
-            # Try to get existing preferences from user document
-            user_doc = self.firebase_service.db.document(f"users/{uid}").get()
+            # Try to get existing preferences from user document (cached briefly)
+            if user_profile is None:
+                user_profile = await self.firebase_service.get_user_profile(uid, use_cache=True)
             
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                preferences_data = user_data.get('user_preferences')
+            if user_profile:
+                preferences_data = user_profile.get('user_preferences')
                 
                 if preferences_data:
-                    preferences_data['uid'] = uid
-                    return UserPreferences(**preferences_data)
+                    return UserPreferences(**{**preferences_data, 'uid': uid})
             
             # Return default preferences if none exist
             default_prefs = UserPreferences(uid=uid)
+            if not user_profile:
+                return default_prefs
             
             # Save default preferences to Firestore
             try:
@@ -246,6 +289,7 @@ class ProfileService:
                     "user_preferences": default_prefs.dict(),
                     "updated_at": datetime.now(timezone.utc)
                 })
+                self.firebase_service.invalidate_user_profile(uid)
             except Exception as save_error:
                 print(f"Warning: Could not save default user preferences: {save_error}")
             
@@ -272,6 +316,7 @@ class ProfileService:
                 "user_preferences": prefs_data,
                 "updated_at": datetime.now(timezone.utc)
             })
+            self.firebase_service.invalidate_user_profile(uid)
             
             print(f"User preferences updated for user {uid}")
             return preferences
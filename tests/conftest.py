@@ -0,0 +1,120 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+
+class FakeSnapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentRef:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self, self._db.documents.get(self.path))
+
+
+class FakeCollectionRef:
+    def __init__(self, db, name):
+        self._db = db
+        self._name = name
+
+    def document(self, doc_id):
+        return FakeDocumentRef(self._db, f"{self._name}/{doc_id}")
+
+
+class FakeTransaction:
+    """Applies writes straight to the fake database (firestore.transactional is patched out)"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def set(self, ref, data, merge=False):
+        self._db.set(ref.path, data, merge)
+
+    def update(self, ref, data):
+        self._db.update(ref.path, data)
+
+    def delete(self, ref):
+        self._db.documents.pop(ref.path, None)
+
+
+class FakeFirestore:
+    """Just enough of a Firestore client for the document/index write paths"""
+
+    def __init__(self):
+        self.documents = {}
+
+    def collection(self, name):
+        return FakeCollectionRef(self, name)
+
+    def document(self, path):
+        return FakeDocumentRef(self, path)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def set(self, path, data, merge=False):
+        if not merge or path not in self.documents:
+            self.documents[path] = {}
+        self._merge(self.documents[path], data)
+
+    def update(self, path, data):
+        document = self.documents[path]
+        for dotted, value in data.items():
+            *parents, key = dotted.split(".")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            self._apply(target, key, value)
+
+    def _merge(self, target, data):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                self._merge(target.setdefault(key, {}), value)
+            else:
+                self._apply(target, key, value)
+
+    def _apply(self, target, key, value):
+        from google.cloud.firestore_v1 import transforms
+
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, transforms.ArrayUnion):
+            current = target.get(key, [])
+            target[key] = current + [item for item in value.values if item not in current]
+        elif isinstance(value, transforms.ArrayRemove):
+            target[key] = [item for item in target.get(key, []) if item not in value.values]
+        elif isinstance(value, transforms.Increment):
+            target[key] = target.get(key, 0) + value.value
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+@pytest.fixture
+def firebase_service(monkeypatch):
+    """FirebaseService over an in-memory Firestore"""
+    firebase_service_module = pytest.importorskip("services.firebase_service")
+    monkeypatch.setattr(firebase_service_module.firestore, "transactional", lambda func: func)
+
+    service = firebase_service_module.FirebaseService()
+    service.db = FakeFirestore()
+    service._initialized = True
+    return service
@@ -0,0 +1,41 @@
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from starlette.requests import Request
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from conditional_get import conditional_json_response
+
+
+class FirestoreDatetime(datetime):
+    """Stand-in for google.api_core's DatetimeWithNanoseconds (a datetime subclass)"""
+
+
+def make_request(headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+def test_datetime_subclass_is_encoded_as_isoformat():
+    updated_at = FirestoreDatetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+    response = conditional_json_response(make_request(), [{"id": "doc-1", "updated_at": updated_at}])
+
+    assert response.status_code == 200
+    assert json.loads(response.body) == [{"id": "doc-1", "updated_at": updated_at.isoformat()}]
+
+
+def test_matching_etag_returns_304():
+    content = {"updated_at": FirestoreDatetime(2024, 5, 1, tzinfo=timezone.utc)}
+    etag = conditional_json_response(make_request(), content).headers["etag"]
+
+    response = conditional_json_response(make_request({"If-None-Match": etag}), content)
+
+    assert response.status_code == 304
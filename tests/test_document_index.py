@@ -0,0 +1,55 @@
+import asyncio
+
+from models.document_models import DocumentCreate
+
+
+def create_chat_document(firebase_service, user_id):
+    """Create a document the way send_chat_message does for AI-generated documents"""
+    doc_data = DocumentCreate(
+        title="Meeting notes",
+        content="Agenda and action items",
+        document_type="ai_generated"
+    )
+    return asyncio.run(firebase_service.create_document_with_index(
+        collection="documents",
+        data=doc_data.model_dump(),
+        user_id=user_id,
+        index_type="document_ids"
+    ))
+
+
+def test_chat_generated_document_is_owned_by_its_user(firebase_service):
+    doc_id = create_chat_document(firebase_service, "alice")
+
+    assert firebase_service.db.documents[f"documents/{doc_id}"]["user_id"] == "alice"
+
+
+def test_owner_can_delete_chat_generated_document(firebase_service):
+    doc_id = create_chat_document(firebase_service, "alice")
+
+    deleted = asyncio.run(firebase_service.delete_document_with_index("documents", doc_id, "alice", "document_ids"))
+
+    user_doc = firebase_service.db.documents["users/alice"]
+    assert deleted is True
+    assert f"documents/{doc_id}" not in firebase_service.db.documents
+    assert doc_id not in user_doc["indexes"]["document_ids"]
+    assert doc_id not in user_doc["document_summaries"]
+    assert user_doc["stats"]["total_documents"] == 0
+
+
+def test_other_user_cannot_delete_document(firebase_service):
+    doc_id = create_chat_document(firebase_service, "alice")
+
+    deleted = asyncio.run(firebase_service.delete_document_with_index("documents", doc_id, "mallory", "document_ids"))
+
+    assert deleted is False
+    assert f"documents/{doc_id}" in firebase_service.db.documents
+
+
+def test_owner_can_delete_indexed_document_without_user_id(firebase_service):
+    doc_id = create_chat_document(firebase_service, "alice")
+    del firebase_service.db.documents[f"documents/{doc_id}"]["user_id"]
+
+    assert asyncio.run(firebase_service.delete_document_with_index("documents", doc_id, "mallory", "document_ids")) is False
+    assert asyncio.run(firebase_service.delete_document_with_index("documents", doc_id, "alice", "document_ids")) is True
+    assert doc_id not in firebase_service.db.documents["users/alice"]["indexes"]["document_ids"]
@@ -0,0 +1,56 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pagination import decode_cursor, encode_cursor
+
+
+class FirestoreDatetime(datetime):
+    """Stand-in for google.api_core's DatetimeWithNanoseconds (a datetime subclass)"""
+
+
+def firestore_sort_key(value):
+    """Firestore orders timestamps before strings, whatever their contents"""
+    return (0, value) if isinstance(value, datetime) else (1, value)
+
+
+def read_page(documents, limit, start_after=None):
+    """In-memory equivalent of order_by(created_at).order_by(__name__).start_after(...).limit(...)"""
+    ordered = sorted(documents, key=lambda doc: (firestore_sort_key(doc["created_at"]), doc["id"]))
+    if start_after is not None:
+        value, doc_id = start_after
+        cursor_key = (firestore_sort_key(value), doc_id)
+        ordered = [doc for doc in ordered if (firestore_sort_key(doc["created_at"]), doc["id"]) > cursor_key]
+    return ordered[:limit]
+
+
+def test_cursor_pages_past_the_first_page():
+    start = FirestoreDatetime(2024, 5, 1, 9, 0, tzinfo=timezone.utc)
+    tasks = [{"id": f"task-{i}", "created_at": start + timedelta(minutes=i)} for i in range(5)]
+
+    first_page = read_page(tasks, limit=2)
+    cursor = encode_cursor(first_page[-1], "created_at")
+    second_page = read_page(tasks, limit=2, start_after=decode_cursor(cursor))
+
+    assert [task["id"] for task in first_page] == ["task-0", "task-1"]
+    assert [task["id"] for task in second_page] == ["task-2", "task-3"]
+
+
+def test_cursor_keeps_position_between_equal_timestamps():
+    created_at = FirestoreDatetime(2024, 5, 1, tzinfo=timezone.utc)
+    tasks = [{"id": f"task-{i}", "created_at": created_at} for i in range(3)]
+
+    cursor = encode_cursor(read_page(tasks, limit=1)[-1], "created_at")
+
+    assert [task["id"] for task in read_page(tasks, limit=5, start_after=decode_cursor(cursor))] == ["task-1", "task-2"]
+
+
+def test_garbage_cursor_is_a_400():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400